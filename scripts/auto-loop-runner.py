@@ -34,7 +34,10 @@ from pathlib import Path
 
 # ── 框架内部导入 ──────────────────────────────────────────
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from fw_utils import validate_safe_id, load_run_config, load_session_state, load_baseline
+from fw_utils import (
+    validate_safe_id, load_run_config, load_session_state, load_baseline, load_yaml_cached, scan_files,
+    dump_session_state, get_yaml,
+)
 
 
 def _check_all_tasks_pass(dev_state: Path, iteration_id: str) -> bool:
@@ -43,18 +46,16 @@ def _check_all_tasks_pass(dev_state: Path, iteration_id: str) -> bool:
     if not tasks_dir.exists():
         return False
 
-    task_files = list(tasks_dir.glob("*.yaml"))
+    task_files = scan_files(tasks_dir, ".yaml")
     if not task_files:
         return False
 
-    try:
-        import yaml
-    except ImportError:
+    if get_yaml() is None:
         print("[ERROR] PyYAML 未安装")
         return False
 
     for tf in task_files:
-        task = yaml.safe_load(tf.read_text(encoding="utf-8")) or {}
+        task = load_yaml_cached(Path(tf.path), tf.stat()) or {}
         status = task.get("status")
         if status is None:
             print(f"  [WARN] {tf.name}: status 字段缺失，跳过")
@@ -156,10 +157,10 @@ def _update_session_after_run(project_dir: Path, claude_failed: bool, progress_d
     # M14: 原子写入（write-to-temp-then-rename）
     tmp_path = state_path.parent / f".session-state-{os.getpid()}.tmp"
     try:
-        tmp_path.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp_path.write_text(dump_session_state(state), encoding="utf-8")
         tmp_path.replace(state_path)
     except OSError:
-        state_path.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+        state_path.write_text(dump_session_state(state), encoding="utf-8")
 
 
 def run_auto_loop(
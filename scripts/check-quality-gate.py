@@ -53,7 +53,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 from fw_utils import (
     GIT_EMPTY_TREE, validate_safe_id,
     load_baseline, parse_pytest_passed, detect_toolchain,
-    load_run_config, build_test_cmd, build_lint_cmd,
+    load_run_config, build_test_cmd, build_lint_cmd, load_yaml_cached, scan_files,
 )
 
 
@@ -163,7 +163,8 @@ def gate_2_task_plan(project_dir: Path, **kwargs) -> bool:
     verify_dir = iter_dir / "verify"
     errors: list[str] = []
 
-    if not tasks_dir.exists() or not list(tasks_dir.glob("*.yaml")):
+    task_files = scan_files(tasks_dir, ".yaml")
+    if not task_files:
         errors.append("tasks 目录为空或不存在")
     else:
         try:
@@ -174,14 +175,14 @@ def gate_2_task_plan(project_dir: Path, **kwargs) -> bool:
             print(f"\n  Gate 2: [FAIL]")
             return False
 
-        verify_files = {f.stem for f in verify_dir.glob("*.py")} if verify_dir.exists() else set()
-        task_files = sorted(tasks_dir.glob("*.yaml"))
+        verify_files = {e.name[:-3] for e in scan_files(verify_dir, ".py")}
         print(f"  任务文件: {len(task_files)} 个")
         print(f"  验收脚本: {len(verify_files)} 个")
 
-        for tf in task_files:
+        for entry in task_files:
+            tf = Path(entry.path)
             try:
-                task = yaml.safe_load(tf.read_text(encoding="utf-8"))
+                task = load_yaml_cached(tf, entry.stat())
             except Exception:
                 errors.append(f"{tf.stem}: YAML 解析失败")
                 continue
@@ -486,7 +487,7 @@ def gate_6_code_review(project_dir: Path, **kwargs) -> bool | str:
         if not tf.exists():
             continue
         try:
-            task = yaml.safe_load(tf.read_text(encoding="utf-8"))
+            task = load_yaml_cached(tf)
             if not task:
                 continue
         except Exception as e:
@@ -8,18 +8,52 @@ fw_utils.py — 框架脚本共享工具函数
 
 from __future__ import annotations  # M35/M36: 支持 Python 3.7+ 新式类型注解
 
+import contextlib
+import copy
+import functools
 import json
+import os
 import re
 import shlex
 import shutil
-import subprocess
 import sys
+import time
 from pathlib import Path
 
 try:
-    import yaml
+    import orjson  # 可选：C 实现的 JSON 编解码，未安装时回退标准库 json
 except ImportError:
-    yaml = None  # type: ignore
+    orjson = None  # type: ignore
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_impl():
+    """首次使用时才导入 PyYAML，返回 (yaml, Loader, Dumper)；未安装时全部为 None。
+
+    导入 PyYAML + libyaml 需要数十毫秒，status/resume 等不读 YAML 的命令无需承担。
+    优先使用 libyaml 的 C 实现，未编译 libyaml 时回退到纯 Python 版本。
+    """
+    try:
+        import yaml
+    except ImportError:
+        return None, None, None
+    return (
+        yaml,
+        getattr(yaml, "CSafeLoader", yaml.SafeLoader),
+        getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+    )
+
+
+def get_yaml():
+    """按需导入并返回 yaml 模块；PyYAML 未安装时返回 None。"""
+    return _yaml_impl()[0]
+
+
+def __getattr__(name: str):
+    # 兼容 `from fw_utils import yaml` / `fw_utils.yaml`：访问时才导入 PyYAML
+    if name == "yaml":
+        return get_yaml()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ============================================================
@@ -30,6 +64,7 @@ _PHASES = ((0, "phase_0"), (1, "phase_1"), (2, "phase_2"), (3, "phase_3"),
            (3.5, "phase_3.5"), (4, "phase_4"), (5, "phase_5"))
 PHASE_NUMS = [n for n, _ in _PHASES]
 PHASE_ORDER = [s for _, s in _PHASES]
+PHASE_INDEX = {s: i for i, s in enumerate(PHASE_ORDER)}  # phase 名 → 顺序下标
 
 # git 空树哈希（SHA-1），用作无提交时的 diff 基准
 GIT_EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
@@ -61,8 +96,29 @@ def detect_toolchain(project_dir: Path, config: dict) -> dict:
     2. 项目根目录下的 uv.lock → uv run
     3. 项目根目录下的 poetry.lock → poetry run
     4. 回退到标准 Python
+
+    结果按 (项目目录, toolchain 配置) 在进程内缓存：同一进程多次构建命令时不再重复
+    PATH 查找与复合命令 --version 验证。返回值是副本，调用方可自由修改。
     """
     toolchain = config.get("toolchain", {})
+    try:
+        key = tuple(sorted(toolchain.items()))
+        hash(key)
+    except TypeError:  # 配置值不可哈希（手写的非常规 YAML），直接检测
+        return _detect_toolchain_uncached(project_dir, toolchain)
+    return dict(_detect_toolchain_cached(Path(project_dir), key))
+
+
+@functools.lru_cache(maxsize=32)
+def _detect_toolchain_cached(project_dir: Path, toolchain_items: tuple) -> dict:
+    """按 (项目目录, 排序后的 toolchain 键值对) 缓存检测结果。"""
+    return _detect_toolchain_uncached(project_dir, dict(toolchain_items))
+
+
+def _detect_toolchain_uncached(project_dir: Path, toolchain: dict) -> dict:
+    """detect_toolchain 的实际检测逻辑（不经缓存）。"""
+    import subprocess  # 仅复合命令验证时需要，避免拖慢只读脚本的启动
+
     detected = {}
 
     # --- test_runner ---
@@ -138,10 +194,19 @@ def detect_toolchain(project_dir: Path, config: dict) -> dict:
     return detected
 
 
+_DEFAULT_TEST_RUNNER = f"{sys.executable} -m pytest"
+_DEFAULT_LINTER = f"{sys.executable} -m ruff check ."
+
+
+@functools.lru_cache(maxsize=32)
+def _split_command(command: str) -> tuple[str, ...]:
+    """按 shell 规则切分命令字符串；同一配置串只切分一次。"""
+    return tuple(shlex.split(command))
+
+
 def build_test_cmd(toolchain: dict, test_dir: str, extra_args: list[str] | None = None) -> list[str]:
     """根据工具链构建 pytest 命令行列表。"""
-    base = shlex.split(toolchain.get("test_runner", f"{sys.executable} -m pytest"))
-    cmd = base + [test_dir]
+    cmd = [*_split_command(toolchain.get("test_runner", _DEFAULT_TEST_RUNNER)), test_dir]
     if extra_args:
         cmd.extend(extra_args)
     return cmd
@@ -149,7 +214,7 @@ def build_test_cmd(toolchain: dict, test_dir: str, extra_args: list[str] | None
 
 def build_lint_cmd(toolchain: dict) -> list[str]:
     """根据工具链构建 lint 命令行列表。"""
-    return shlex.split(toolchain.get("linter", f"{sys.executable} -m ruff check ."))
+    return list(_split_command(toolchain.get("linter", _DEFAULT_LINTER)))
 
 
 # ============================================================
@@ -157,19 +222,30 @@ def build_lint_cmd(toolchain: dict) -> list[str]:
 # ============================================================
 
 
+_RE_PYTEST_PASSED = re.compile(r"(\d+) passed")
+_RE_PYTEST_COUNT = re.compile(r"(\d+) (passed|failed|skipped)")
+
+
 def parse_pytest_passed(output: str) -> int:
     """从 pytest 输出中解析 passed 数量（简化版）。"""
-    match = re.search(r"(\d+) passed", output)
+    match = _RE_PYTEST_PASSED.search(output)
     return int(match.group(1)) if match else 0
 
 
 def parse_pytest_output(output: str) -> dict:
-    """从 pytest 输出中解析 passed/failed/skipped 数量，返回三元组字典。"""
+    """从 pytest 输出中解析 passed/failed/skipped 数量，返回三元组字典。
+
+    一次扫描同时匹配三种计数，每种取首次出现的值；三种都找到后提前结束。
+    """
     result = {"passed": 0, "failed": 0, "skipped": 0}
-    for key in result:
-        match = re.search(rf"(\d+) {key}", output)
-        if match:
+    seen = set()
+    for match in _RE_PYTEST_COUNT.finditer(output):
+        key = match.group(2)
+        if key not in seen:
+            seen.add(key)
             result[key] = int(match.group(1))
+            if len(seen) == 3:
+                break
     return result
 
 
@@ -182,11 +258,12 @@ def load_run_config(project_dir: Path) -> dict:
     config_path = project_dir / ".claude" / "dev-state" / "run-config.yaml"
     if not config_path.exists():
         return {}
+    yaml, loader, _ = _yaml_impl()
     if yaml is None:
         print("[WARN] PyYAML 未安装，无法加载 run-config.yaml")
         return {}
     try:
-        return yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+        return yaml.load(config_path.read_text(encoding="utf-8"), Loader=loader) or {}
     except yaml.YAMLError as e:
         print(f"[ERROR] run-config.yaml 解析失败: {e}")
         return {}
@@ -195,10 +272,10 @@ def load_run_config(project_dir: Path) -> dict:
 def load_session_state(project_dir: Path) -> dict:
     """加载 session-state.json，返回字典。缺失或损坏文件返回空字典。"""
     state_path = project_dir / ".claude" / "dev-state" / "session-state.json"
-    if not state_path.exists():
-        return {}
     try:
         return json.loads(state_path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
     except (json.JSONDecodeError, OSError) as e:
         print(f"[WARN] 读取 session-state.json 失败: {e}")
         return {}
@@ -216,41 +293,206 @@ def load_baseline(project_dir: Path) -> dict | None:
         return None
 
 
+_MANIFEST_REQUIRED_FIELDS = ("id", "mode", "status", "created_at", "phase")
+_RE_MANIFEST_ID = re.compile(r"^iter-\d+$")
+_RE_MANIFEST_PHASE = re.compile(r"^phase_\d+(\.5)?$")
+
+
 def validate_manifest(manifest: dict) -> list[str]:
     """校验 manifest.json 数据完整性，返回错误列表（空列表=通过）。"""
-    errors: list[str] = []
-    required_fields = ["id", "mode", "status", "created_at", "phase"]
-    for field in required_fields:
-        if field not in manifest:
-            errors.append(f"缺少必填字段: {field}")
+    errors = [f"缺少必填字段: {f}" for f in _MANIFEST_REQUIRED_FIELDS if f not in manifest]
     mid = manifest.get("id", "")
-    if mid and not re.match(r"^iter-\d+$", mid):
+    if mid and not _RE_MANIFEST_ID.match(mid):
         errors.append(f"id 格式无效: '{mid}'（期望 iter-N）")
     mode = manifest.get("mode", "")
     if mode and mode not in ("init", "iterate"):
         errors.append(f"mode 值无效: '{mode}'（期望 init 或 iterate）")
     phase = manifest.get("phase", "")
-    if phase and not re.match(r"^phase_\d+(\.5)?$", phase):
+    if phase and not _RE_MANIFEST_PHASE.match(phase):
         errors.append(f"phase 格式无效: '{phase}'（期望 phase_N 或 phase_N.5）")
     return errors
 
 
 def validate_safe_id(value: str, label: str = "id") -> None:
-    """校验 ID 不包含路径遍历字符（..、/、\\），不安全时终止进程。"""
+    """校验 ID 不包含路径遍历字符（..、/、\\），不安全时终止进程。
+
+    注意：update-task-field.py 使用更严格的 ASCII 白名单（[A-Za-z0-9._-]{1,64}），
+    此处接受的非 ASCII 迭代/任务 ID 无法通过该脚本写入字段。
+    """
     if ".." in value or "/" in value or "\\" in value:
         print(f"[ERROR] {label} 包含非法字符: {value}")
         sys.exit(1)
 
 
+def utc_isoformat(ns: int | None = None) -> str:
+    """返回 UTC ISO-8601 时间戳（含微秒与 +00:00），与 datetime.isoformat 格式一致。
+
+    基于 time.time_ns()，避免创建 datetime 对象；ns 为纳秒时间戳，缺省取当前时间。
+    """
+    if ns is None:
+        ns = time.time_ns()
+    sec, rem = divmod(ns, 1_000_000_000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(sec))}.{rem // 1000:06d}+00:00"
+
+
+def json_loads(data: str | bytes):
+    """解析 JSON 文本或 UTF-8 字节串；安装了 orjson 时使用其 C 实现。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# 标准库回退路径复用的编码器：json.dumps 传入非默认参数时每次都会新建 JSONEncoder
+_JSON_ENCODER_PRETTY = json.JSONEncoder(indent=2, ensure_ascii=False)
+_JSON_ENCODER_COMPACT = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def json_dumps(obj, pretty: bool = False, default=None) -> str:
+    """序列化 JSON，保留非 ASCII 字符。默认紧凑格式，pretty=True 时 2 空格缩进。"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+    if default is None:
+        return (_JSON_ENCODER_PRETTY if pretty else _JSON_ENCODER_COMPACT).encode(obj)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default)
+
+
+def dump_session_state(state: dict) -> str:
+    """session-state.json 的统一序列化格式（2 空格缩进，保留非 ASCII）。
+
+    所有写入 session-state.json 的脚本都经由此函数，避免文件格式随最后写入的脚本来回切换。
+    """
+    return json_dumps(state, pretty=True)
+
+
+def _same_file_content(a: Path, b: Path) -> bool:
+    """逐块比较两个文件内容是否完全相同；任一文件不存在返回 False。"""
+    try:
+        if os.path.getsize(a) != os.path.getsize(b):
+            return False
+        with open(a, "rb") as fa, open(b, "rb") as fb:
+            while True:
+                chunk_a = fa.read(65536)
+                if chunk_a != fb.read(65536):
+                    return False
+                if not chunk_a:
+                    return True
+    except FileNotFoundError:
+        return False
+
+
+@contextlib.contextmanager
+def atomic_open(
+    path: Path, encoding: str = "utf-8", skip_unchanged: bool = False, binary: bool = False,
+):
+    """原子写入文本文件：先写同目录临时文件，退出 with 块时再 os.replace 覆盖目标。
+
+    写入中途崩溃或抛出异常时，目标文件保持旧内容，不会出现截断的半截文件。
+    适合需要分段/流式写入的场景；一次性写入字符串用 atomic_write_text。
+    skip_unchanged=True 时新内容与目标文件完全相同则丢弃临时文件，目标的 mtime 不变。
+    binary=True 时以二进制模式打开（忽略 encoding），写入 bytes。
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with (open(tmp, "wb") if binary else open(tmp, "w", encoding=encoding)) as fh:
+            yield fh
+        if skip_unchanged and _same_file_content(tmp, path):
+            os.unlink(tmp)
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, data: str, encoding: str = "utf-8") -> None:
+    """原子写入文本文件（见 atomic_open）。"""
+    with atomic_open(path, encoding) as fh:
+        fh.write(data)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """原子写入已编码的字节内容（见 atomic_open），按字节改写的文件无需再解码/编码。"""
+    with atomic_open(path, binary=True) as fh:
+        fh.write(data)
+
+
+def dump_yaml(data: dict) -> str:
+    """按框架统一格式序列化 YAML（保留键顺序、允许 Unicode）。"""
+    yaml, _, dumper = _yaml_impl()
+    return yaml.dump(
+        data, Dumper=dumper,
+        allow_unicode=True, default_flow_style=False, sort_keys=False,
+    )
+
+
+def load_yaml_text(text: str | bytes):
+    """按框架统一方式解析 YAML 文本（优先 libyaml）。解析失败抛出 yaml.YAMLError。"""
+    yaml, loader, _ = _yaml_impl()
+    return yaml.load(text, Loader=loader)
+
+
+# mtime 距当前时间小于该窗口的文件不入缓存：粗粒度文件系统（FAT/exFAT 2 s、HFS+ 1 s、
+# 部分网络挂载）上，同一刻度内的等长改写（如 FAIL↔PASS）无法靠 (mtime, size) 区分
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def _read_yaml_file(path_str: str):
+    """读取并解析 YAML 文件（不经缓存）。"""
+    yaml, loader, _ = _yaml_impl()
+    with open(path_str, encoding="utf-8") as fh:
+        return yaml.load(fh, Loader=loader)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_yaml_file(path_str: str, mtime_ns: int, size: int, ino: int, ctime_ns: int):
+    """解析 YAML 文件。除路径外的参数仅作为缓存键，文件变更后自动失效。"""
+    return _read_yaml_file(path_str)
+
+
+def load_yaml_cached(path: Path, st: os.stat_result | None = None):
+    """按 (路径, mtime, size, inode, ctime) 缓存解析 YAML 文件，返回可自由修改的深拷贝。
+
+    st 可传入已获取的 stat 结果（如 os.DirEntry.stat()），省去一次 stat 调用。
+    save_task_yaml / atomic_write_text 以替换方式写入，每次写入 inode 都会变化；
+    刚修改过（处于时间戳粒度窗口内）的文件直接重新解析，不读也不写缓存。
+    解析或读取失败时抛出 yaml.YAMLError / OSError，由调用方处理。
+    """
+    if st is None:
+        st = path.stat()
+    if time.time_ns() - st.st_mtime_ns < _RACY_WINDOW_NS:
+        return _read_yaml_file(str(path))
+    return copy.deepcopy(
+        _parse_yaml_file(str(path), st.st_mtime_ns, st.st_size, st.st_ino, st.st_ctime_ns)
+    )
+
+
+def scan_files(dir_path: Path, suffix: str) -> list[os.DirEntry]:
+    """单次 os.scandir 列出目录下指定后缀的文件，按文件名排序。目录不存在返回空列表。"""
+    try:
+        with os.scandir(dir_path) as it:
+            entries = [e for e in it if e.name.endswith(suffix) and e.is_file()]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda e: e.name)
+    return entries
+
+
 def load_task_yaml(task_path: Path) -> dict | None:
     """加载单个任务 YAML 文件，返回字典。"""
+    yaml = get_yaml()
     if yaml is None:
         print("[ERROR] PyYAML 未安装。运行: pip install PyYAML>=6.0")
         return None
     if not task_path.exists():
         return None
     try:
-        return yaml.safe_load(task_path.read_text(encoding="utf-8"))
+        return load_yaml_cached(task_path)
     except yaml.YAMLError as e:
         print(f"[ERROR] YAML 解析失败 ({task_path}): {e}")
         return None
@@ -264,13 +506,10 @@ def save_task_yaml(task_path: Path, task: dict) -> None:
 
     注意：yaml.dump 会丢失原文件注释。
     """
-    if yaml is None:
+    if get_yaml() is None:
         print("[ERROR] PyYAML 未安装，无法保存任务文件")
         return
-    task_path.write_text(
-        yaml.dump(task, allow_unicode=True, default_flow_style=False, sort_keys=False),
-        encoding="utf-8",
-    )
+    atomic_write_text(task_path, dump_yaml(task))
 
 
 # ============================================================
@@ -279,7 +518,6 @@ def save_task_yaml(task_path: Path, task: dict) -> None:
 
 def get_framework_dir() -> Path:
     """获取框架根目录。支持 DEV_FRAMEWORK_DIR 环境变量覆盖。"""
-    import os
     env_dir = os.environ.get("DEV_FRAMEWORK_DIR")
     if env_dir:
         return Path(env_dir)
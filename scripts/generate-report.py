@@ -19,7 +19,10 @@ from pathlib import Path
 
 # 添加 scripts 目录到 path 以导入 fw_utils
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from fw_utils import GIT_EMPTY_TREE, validate_safe_id, detect_toolchain, load_run_config, build_test_cmd
+from fw_utils import (
+    GIT_EMPTY_TREE, validate_safe_id, detect_toolchain, load_run_config, build_test_cmd,
+    load_yaml_cached, scan_files,
+)
 
 try:
     import yaml
@@ -34,15 +37,13 @@ def load_tasks(project_dir: Path, iteration_id: str) -> list[dict]:
         project_dir / ".claude" / "dev-state" / iteration_id / "tasks"
     )
     tasks = []
-    if tasks_dir.exists():
-        for f in sorted(tasks_dir.glob("*.yaml")):
-            try:
-                content = f.read_text(encoding="utf-8")
-                task = yaml.safe_load(content)
-                if task:
-                    tasks.append(task)
-            except Exception as e:
-                print(f"  WARN: 解析 {f} 失败: {e}", file=sys.stderr)
+    for entry in scan_files(tasks_dir, ".yaml"):
+        try:
+            task = load_yaml_cached(Path(entry.path), entry.stat())
+            if task:
+                tasks.append(task)
+        except Exception as e:
+            print(f"  WARN: 解析 {entry.path} 失败: {e}", file=sys.stderr)
     return tasks
 
 
@@ -139,7 +140,7 @@ def generate_report(project_dir: Path, iteration_id: str) -> None:
         test_result = _NoTestResult()
 
     # 生成报告
-    report = f"""# 迭代报告: {iteration_id}
+    parts = [f"""# 迭代报告: {iteration_id}
 
 生成时间: {datetime.now(timezone.utc).isoformat()}
 
@@ -158,7 +159,7 @@ def generate_report(project_dir: Path, iteration_id: str) -> None:
 
 | CR | 类型 | 标题 | 状态 | 重试 |
 |----|------|------|------|------|
-"""
+"""]
 
     for t in tasks:
         tid = t.get("id", "?")
@@ -166,27 +167,27 @@ def generate_report(project_dir: Path, iteration_id: str) -> None:
         title = t.get("title", "?")
         status = t.get("status", "?")
         retries = t.get("retries", 0)
-        report += f"| {tid} | {ttype} | {title} | {status} | {retries} |\n"
+        parts.append(f"| {tid} | {ttype} | {title} | {status} | {retries} |\n")
 
-    report += f"""
+    parts.append(f"""
 ## 测试结果
 
 ```
 {test_result.stdout.strip()[-500:]}
 ```
-"""
+""")
 
     if baseline:
-        report += f"""
+        parts.append(f"""
 ### 基线对比
 
 | 指标 | 基线 | 当前 |
 |------|------|------|
 | L1 passed | {baseline['test_results']['l1_passed']} | (见上方) |
 | L2 passed | {baseline['test_results']['l2_passed']} | (见上方) |
-"""
+""")
 
-    report += f"""
+    parts.append(f"""
 ## 代码变更统计
 
 ```
@@ -195,7 +196,7 @@ def generate_report(project_dir: Path, iteration_id: str) -> None:
 
 ## 经验教训
 
-"""
+""")
 
     # 读取经验教训（v2.6: 优先从 CLAUDE.md 读取，回退到 experience-log.md）
     claude_md = project_dir / "CLAUDE.md"
@@ -211,15 +212,16 @@ def generate_report(project_dir: Path, iteration_id: str) -> None:
             if idx >= 0:
                 section = content[idx:]
                 lines = section.strip().split("\n")[:20]
-                report += "\n".join(lines)
+                parts.append("\n".join(lines))
                 exp_found = True
                 break
     if not exp_found and exp_log.exists():
         content = exp_log.read_text(encoding="utf-8")
         lines = content.strip().split("\n")[-20:]
-        report += "\n".join(lines)
+        parts.append("\n".join(lines))
     elif not exp_found:
-        report += "(无记录)\n"
+        parts.append("(无记录)\n")
+    report = "".join(parts)
 
     # 写入报告
     report_path = (
@@ -27,7 +27,7 @@ from pathlib import Path
 
 # 添加 scripts 目录到 path 以导入 fw_utils
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from fw_utils import validate_manifest, validate_safe_id
+from fw_utils import dump_session_state, load_yaml_cached, scan_files, validate_manifest, validate_safe_id
 
 try:
     import yaml
@@ -93,9 +93,10 @@ def _collect_backlog(dev_state: Path, current_iter_id: str) -> list[dict]:
         return []
 
     backlog = []
-    for task_file in sorted(tasks_dir.glob("*.yaml")):
+    for entry in scan_files(tasks_dir, ".yaml"):
+        task_file = Path(entry.path)
         try:
-            data = yaml.safe_load(task_file.read_text(encoding="utf-8"))
+            data = load_yaml_cached(task_file, entry.stat())
         except Exception:
             continue
         if not data or not isinstance(data, dict):
@@ -287,7 +288,7 @@ def init_iteration(
     })
     session_state["consecutive_failures"] = 0
     session_state_path.write_text(
-        json.dumps(session_state, indent=2, ensure_ascii=False), encoding="utf-8"
+        dump_session_state(session_state), encoding="utf-8"
     )
     print(f"  更新: session-state.json")
 
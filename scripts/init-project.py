@@ -27,7 +27,7 @@ from pathlib import Path
 
 # ── 框架内部导入 ──────────────────────────────────────────
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from fw_utils import detect_toolchain, load_run_config, get_framework_dir
+from fw_utils import detect_toolchain, dump_session_state, load_run_config, get_framework_dir
 
 
 def append_gitignore(project_dir: Path):
@@ -61,6 +61,7 @@ def append_gitignore(project_dir: Path):
 **/experience-log.md
 **/run-config.yaml
 **/context-snapshot.md
+**/.tasks-index.cache.json
 
 # === dev-framework: 自动生成规则结束 ===
 """
@@ -328,7 +329,7 @@ def init_project(project_dir: Path, requirement_doc: str, tech_stack: str) -> No
     }
     state_path = project_dir / ".claude" / "dev-state" / "session-state.json"
     state_path.write_text(
-        json.dumps(session_state, indent=2, ensure_ascii=False), encoding="utf-8"
+        dump_session_state(session_state), encoding="utf-8"
     )
     print(f"  生成: session-state.json")
 
@@ -30,7 +30,7 @@ from pathlib import Path
 
 # 添加 scripts 目录到 path 以导入 fw_utils
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from fw_utils import validate_manifest, validate_safe_id, PHASE_NUMS
+from fw_utils import load_yaml_cached, scan_files, validate_manifest, validate_safe_id, PHASE_NUMS
 
 try:
     import yaml
@@ -145,9 +145,10 @@ def check_phase_3_to_3_5(iter_dir: Path) -> list[str]:
         errors.append("tasks/ 目录不存在")
         return errors
 
-    for tf in tasks_dir.glob("*.yaml"):
+    for entry in scan_files(tasks_dir, ".yaml"):
+        tf = Path(entry.path)
         try:
-            data = yaml.safe_load(tf.read_text(encoding="utf-8"))
+            data = load_yaml_cached(tf, entry.stat())
         except yaml.YAMLError as e:
             errors.append(f"{tf.name}: YAML 解析失败 — {e}")
             continue
@@ -174,9 +175,10 @@ def check_phase_3_5_to_4(iter_dir: Path) -> list[str]:
     if not tasks_dir.exists():
         errors.append("tasks/ 目录不存在")
         return errors
-    for tf in tasks_dir.glob("*.yaml"):
+    for entry in scan_files(tasks_dir, ".yaml"):
+        tf = Path(entry.path)
         try:
-            data = yaml.safe_load(tf.read_text(encoding="utf-8"))
+            data = load_yaml_cached(tf, entry.stat())
         except yaml.YAMLError as e:
             errors.append(f"{tf.name}: YAML 解析失败 — {e}")
             continue
@@ -205,9 +207,10 @@ def check_phase_4_to_5(iter_dir: Path) -> list[str]:
         errors.append("tasks/ 目录不存在")
         return errors
 
-    for tf in tasks_dir.glob("*.yaml"):
+    for entry in scan_files(tasks_dir, ".yaml"):
+        tf = Path(entry.path)
         try:
-            data = yaml.safe_load(tf.read_text(encoding="utf-8"))
+            data = load_yaml_cached(tf, entry.stat())
         except yaml.YAMLError as e:
             errors.append(f"{tf.name}: YAML 解析失败 — {e}")
             continue
@@ -266,12 +269,13 @@ def check_phase_5_complete(iter_dir: Path) -> list[str]:
         return errors
 
     # 检查 1：所有 CR status=PASS
-    task_files = list(tasks_dir.glob("*.yaml"))
+    task_files = scan_files(tasks_dir, ".yaml")
     if not task_files:
         errors.append("tasks/ 目录为空")
-    for tf in task_files:
+    for entry in task_files:
+        tf = Path(entry.path)
         try:
-            data = yaml.safe_load(tf.read_text(encoding="utf-8"))
+            data = load_yaml_cached(tf, entry.stat())
         except (yaml.YAMLError, OSError) as e:
             errors.append(f"{tf.name}: 读取/解析失败 — {e}")
             continue
@@ -283,9 +287,10 @@ def check_phase_5_complete(iter_dir: Path) -> list[str]:
             errors.append(f"{task_id}: status={status}，预期 PASS")
 
     # 检查 2：所有非 hotfix CR 的 review_result.verdict=PASS
-    for tf in task_files:
+    for entry in task_files:
+        tf = Path(entry.path)
         try:
-            data = yaml.safe_load(tf.read_text(encoding="utf-8"))
+            data = load_yaml_cached(tf, entry.stat())
         except (yaml.YAMLError, OSError):
             continue
         if not data:
@@ -14,24 +14,149 @@ run-verify.py — 运行指定 CR 的验收脚本
         --project-dir "D:/project" \
         --iteration-id "iter-3" \
         --all
+
+    # 并行运行（4 个并发），输出仍按 CR 顺序汇总
+    python dev-framework/scripts/run-verify.py \
+        --project-dir "D:/project" \
+        --iteration-id "iter-3" \
+        --all --parallel 4
 """
 
 import argparse
+import collections
+import contextlib
+import hashlib
 import json
+import os
 import py_compile
 import subprocess
 import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # 添加 scripts 目录到 path 以导入 fw_utils
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from fw_utils import validate_safe_id
+from fw_utils import (
+    atomic_write_text, get_yaml, load_yaml_cached, save_task_yaml, scan_files, validate_safe_id,
+)
+
+# --all 模式下失败脚本在终端展示的日志行数（完整输出见 verify-logs/{task_id}.log）
+_LOG_TAIL_LINES = 20
+
+
+# ============================================================
+# verify 脚本骨架模板（generate_skeleton 使用）
+# 与 templates/verify/verify-task.py.tmpl 保持一致；
+# 使用 str.format 填充，生成代码中的花括号需写成 {{ }}
+# ============================================================
+
+_SKELETON_HEADER = """\
+#!/usr/bin/env python3
+# SKELETON_HASH: {payload_hash}
+\"\"\"
+{task_id} 验收脚本
+需求: {title}
+生成时间: {now}
+
+此脚本骨架由 run-verify.py --generate-skeleton 自动生成。
+analyst 子代理必须补全每个 verify 函数的业务验证逻辑。
+developer 子代理和 verifier 子代理不可修改此脚本。
+零 Mock，使用真实环境验证。
+\"\"\"
+
+import json
+import sys
+import traceback
+from datetime import datetime, timezone
+
+"""
+
+_SKELETON_VERIFY_FN = """\
+def {func_name}():
+    \"\"\"{desc}\"\"\"
+    # TODO: analyst 子代理必须补全此函数的验证逻辑
+    raise NotImplementedError("analyst 子代理必须补全: {desc}")
+
+"""
+
+_SKELETON_CRITERIA_ROW = """\
+        ("{ac_id}", "{desc}", {func_name}),
+"""
+
+_SKELETON_FOOTER = """\
+
+def collect_evidence(results, task_id):
+    \"\"\"收集 done_evidence（供 Verifier 使用）\"\"\"
+    timestamp = datetime.now(timezone.utc).isoformat()
+    passed = sum(1 for _, s, _, _ in results if s == "PASS")
+    total = len(results)
+    return {{
+        "tests": [f"{{task_id}} verify: {{passed}}/{{total}} PASS ({{timestamp}})"],
+        "logs": [f"{{ac_id}}: {{status}} - {{desc}}" for ac_id, status, desc, _ in results],
+        "notes": ["全部通过" if passed == total else "存在失败项，需要修复"],
+    }}
+
+
+def main():
+    results = []
+    criteria = [
+{rows}    ]
+
+    for ac_id, desc, fn in criteria:
+        try:
+            fn()
+            results.append((ac_id, "PASS", desc, ""))
+            print(f"  [PASS]  {{ac_id}}: {{desc}}")
+        except AssertionError as e:
+            results.append((ac_id, "FAIL", desc, str(e)))
+            print(f"  [FAIL]  {{ac_id}}: {{desc}}")
+            print(f"        原因: {{e}}")
+        except NotImplementedError as e:
+            results.append((ac_id, "ERROR", desc, str(e)))
+            print(f"  [ERROR] {{ac_id}}: {{desc}}")
+            print(f"        未实现: {{e}}")
+        except Exception as e:
+            results.append((ac_id, "ERROR", desc, traceback.format_exc()))
+            print(f"  [ERROR] {{ac_id}}: {{desc}}")
+            print(f"        异常: {{e}}")
+
+    passed = sum(1 for _, s, _, _ in results if s == "PASS")
+    total = len(results)
+    print("\\n" + "=" * 50)
+    print(f"{task_id} 验收结果: {{passed}}/{{total}} PASS")
+
+    # 输出 done_evidence JSON（供 Verifier 解析）
+    evidence = collect_evidence(results, "{task_id}")
+    print(f"\\n--- EVIDENCE_JSON ---")
+    print(json.dumps(evidence, indent=2, ensure_ascii=False))
+    print(f"--- END_EVIDENCE ---")
+
+    if passed < total:
+        sys.exit(1)
+    else:
+        print("\\n全部通过!")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()"""
 
 
 def run_single_verify(
-    project_dir: Path, iteration_id: str, task_id: str
+    project_dir: Path, iteration_id: str, task_id: str,
+    log: Callable[[str], None] = print, log_path: Path | None = None,
+    update_status: bool = True, inproc: bool = False,
 ) -> bool:
-    """运行单个 CR 的验收脚本"""
+    """运行单个 CR 的验收脚本
+
+    log 为输出函数，默认直接打印；并行模式下传入缓冲区的 append，
+    由调用方按 CR 顺序统一输出，避免多个脚本的输出交错。
+    log_path 为 None 时子进程直接继承终端输出（实时可见）；
+    否则子进程 stdout/stderr 直接写入该日志文件，失败时仅输出日志末尾若干行。
+    update_status=False 时不写任务文件，由调用方批量更新（见 run_all_verify）。
+    inproc=True 时在当前进程内执行脚本（见 _run_inproc），省去解释器启动开销。
+    """
     verify_script = (
         project_dir
         / ".claude"
@@ -42,8 +167,8 @@ def run_single_verify(
     )
 
     if not verify_script.exists():
-        print(f"  [FAIL]  {task_id}: verify 脚本不存在 ({verify_script})")
-        print(f"        每个 CR 必须有独立的 verify 脚本，请 analyst 子代理先生成")
+        log(f"  [FAIL]  {task_id}: verify 脚本不存在 ({verify_script})")
+        log(f"        每个 CR 必须有独立的 verify 脚本，请 analyst 子代理先生成")
         return False  # 缺失 verify 脚本视为失败
 
     # 预检查: NotImplementedError 骨架占位
@@ -51,42 +176,115 @@ def run_single_verify(
         script_content = verify_script.read_text(encoding="utf-8")
         ni_count = script_content.count("raise NotImplementedError")
         if ni_count > 0:
-            print(f"  [ERROR] {task_id}: verify 脚本包含 {ni_count} 处 raise NotImplementedError，analyst 子代理必须先补全验证逻辑")
+            log(f"  [ERROR] {task_id}: verify 脚本包含 {ni_count} 处 raise NotImplementedError，analyst 子代理必须先补全验证逻辑")
             return False
     except OSError as e:
-        print(f"  [ERROR] {task_id}: 无法读取 verify 脚本: {e}")
+        log(f"  [ERROR] {task_id}: 无法读取 verify 脚本: {e}")
         return False
 
-    print(f"\n{'='*40}")
-    print(f"运行验收: {task_id}")
-    print(f"脚本: {verify_script}")
-    print(f"{'='*40}")
-
-    result = subprocess.run(
-        [sys.executable, str(verify_script)],
-        capture_output=True,
-        text=True,
-        cwd=project_dir,
-        timeout=120,
-        encoding="utf-8",
-        errors="replace",
-    )
-
-    print(result.stdout)
-    if result.stderr:
-        print(result.stderr)
+    log(f"\n{'='*40}")
+    log(f"运行验收: {task_id}")
+    log(f"脚本: {verify_script}")
+    log(f"{'='*40}")
 
-    if result.returncode == 0:
-        # 更新任务文件中的 acceptance_criteria 状态
-        update_task_criteria(project_dir, iteration_id, task_id, passed=True)
-        return True
+    try:
+        if inproc:
+            returncode = _run_inproc(verify_script, project_dir, log_path)
+        elif log_path is None:
+            # 先刷新自身缓冲，保证标题行出现在子进程输出之前
+            sys.stdout.flush()
+            returncode = subprocess.run(
+                [sys.executable, str(verify_script)],
+                cwd=project_dir,
+                timeout=120,
+            ).returncode
+        else:
+            with open(log_path, "wb", buffering=0) as log_fh:
+                returncode = subprocess.run(
+                    [sys.executable, str(verify_script)],
+                    stdout=log_fh,
+                    stderr=subprocess.STDOUT,
+                    cwd=project_dir,
+                    timeout=120,
+                ).returncode
+    except subprocess.TimeoutExpired:
+        log(f"  [FAIL]  {task_id}: verify 脚本超时（120s）")
+        passed = False
     else:
-        update_task_criteria(project_dir, iteration_id, task_id, passed=False)
-        return False
+        passed = returncode == 0
+
+    if log_path is not None:
+        log(f"日志: {log_path}")
+        if not passed:
+            log(f"--- 日志末尾 {_LOG_TAIL_LINES} 行 ---")
+            log(_tail_log(log_path))
+
+    log(f"\n  验收结果: {task_id} = {'PASS' if passed else 'FAIL'}")
+    if update_status:
+        update_task_criteria(project_dir, iteration_id, task_id, passed=passed, log=log)
+    return passed
+
+
+def _run_inproc(verify_script: Path, project_dir: Path, log_path: Path | None) -> int:
+    """在当前进程内用 runpy 执行 verify 脚本，返回等价的退出码。
+
+    模拟 `python script.py` 的运行环境（__main__、sys.argv、sys.path[0]、cwd），
+    结束后恢复 sys.modules / sys.path / sys.argv / cwd，避免脚本之间相互污染。
+    log_path 非空时脚本的 stdout/stderr 写入该文件。不支持超时控制。
+    """
+    import runpy
+    import traceback
+
+    saved_modules = sys.modules.copy()
+    saved_path = sys.path[:]
+    saved_argv = sys.argv[:]
+    saved_cwd = os.getcwd()
+    with contextlib.ExitStack() as stack:
+        if log_path is not None:
+            log_fh = stack.enter_context(
+                open(log_path, "w", encoding="utf-8", errors="replace")
+            )
+            stack.enter_context(contextlib.redirect_stdout(log_fh))
+            stack.enter_context(contextlib.redirect_stderr(log_fh))
+        sys.argv = [str(verify_script)]
+        sys.path.insert(0, str(verify_script.parent))
+        try:
+            os.chdir(project_dir)
+            runpy.run_path(str(verify_script), run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            # 与解释器一致：None 视为 0，非整数参数输出到 stderr 并视为 1
+            code = e.code
+            if code is None:
+                code = 0
+            elif not isinstance(code, int):
+                print(code, file=sys.stderr)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os.chdir(saved_cwd)
+            sys.argv = saved_argv
+            sys.path[:] = saved_path
+            for name in set(sys.modules) - set(saved_modules):
+                del sys.modules[name]
+            sys.modules.update(saved_modules)
+    return code
+
+
+def _tail_log(log_path: Path, lines: int = _LOG_TAIL_LINES) -> str:
+    """读取日志文件末尾若干行，读取失败返回空串。"""
+    try:
+        with open(log_path, encoding="utf-8", errors="replace") as fh:
+            return "".join(collections.deque(fh, maxlen=lines)).rstrip("\n")
+    except OSError:
+        return ""
 
 
 def update_task_criteria(
-    project_dir: Path, iteration_id: str, task_id: str, passed: bool
+    project_dir: Path, iteration_id: str, task_id: str, passed: bool,
+    log: Callable[[str], None] = print,
 ) -> None:
     """更新任务文件中的验收状态。
 
@@ -94,40 +292,40 @@ def update_task_criteria(
     注意：逐条 acceptance_criteria 的状态更新由 verifier 子代理手动执行，
     此函数仅更新任务整体状态。
     """
-    status_label = "PASS" if passed else "FAIL"
-    print(f"\n  验收结果: {task_id} = {status_label}")
-
     task_path = (
         project_dir / ".claude" / "dev-state" / iteration_id / "tasks" / f"{task_id}.yaml"
     )
     if not task_path.exists():
-        print(f"  [WARN]  任务文件不存在，跳过状态更新: {task_path}")
+        log(f"  [WARN]  任务文件不存在，跳过状态更新: {task_path}")
         return
 
-    try:
-        import yaml
+    if get_yaml() is None:
+        log(f"  [ERROR]  PyYAML 未安装，无法自动更新任务文件。运行: pip install PyYAML>=6.0")
+        return
 
-        content = task_path.read_text(encoding="utf-8")
-        task = yaml.safe_load(content)
+    try:
+        task = load_yaml_cached(task_path)
         if not task:
             return
 
         new_status = "ready_for_review" if passed else "rework"
         task["status"] = new_status
-        task_path.write_text(
-            yaml.dump(task, allow_unicode=True, default_flow_style=False, sort_keys=False),
-            encoding="utf-8",
-        )
-        print(f"  任务状态已更新: {task_id} → {new_status}")
-    except ImportError:
-        print(f"  [ERROR]  PyYAML 未安装，无法自动更新任务文件。运行: pip install PyYAML>=6.0")
-        return
+        save_task_yaml(task_path, task)
+        log(f"  任务状态已更新: {task_id} → {new_status}")
     except Exception as e:
-        print(f"  [WARN]  更新任务文件失败: {e}")
+        log(f"  [WARN]  更新任务文件失败: {e}")
+
 
+def run_all_verify(
+    project_dir: Path, iteration_id: str, parallel: int = 1, inproc: bool = False,
+) -> None:
+    """运行整个迭代的所有验收脚本
 
-def run_all_verify(project_dir: Path, iteration_id: str) -> None:
-    """运行整个迭代的所有验收脚本"""
+    各脚本输出写入 verify-logs/{task_id}.log，终端只显示失败脚本的日志末尾。
+    parallel > 1 时使用线程池并发执行（每个任务只是阻塞等待子进程），
+    各 CR 的提示行先缓冲，再按 CR 顺序输出，保证结果可读且确定。
+    inproc=True 时所有脚本在当前进程内串行执行（与 parallel 互斥）。
+    """
     verify_dir = (
         project_dir / ".claude" / "dev-state" / iteration_id / "verify"
     )
@@ -136,18 +334,50 @@ def run_all_verify(project_dir: Path, iteration_id: str) -> None:
         print(f"错误: {verify_dir} 不存在")
         return
 
-    scripts = sorted(verify_dir.glob("*.py"))
-    if not scripts:
+    task_ids = [Path(e.name).stem for e in scan_files(verify_dir, ".py")]
+    if not task_ids:
         print("无验收脚本")
         return
 
-    print(f"运行 {len(scripts)} 个验收脚本")
+    logs_dir = verify_dir.parent / "verify-logs"
+    logs_dir.mkdir(exist_ok=True)
 
-    results = []
-    for script in scripts:
-        task_id = script.stem
-        passed = run_single_verify(project_dir, iteration_id, task_id)
-        results.append((task_id, passed))
+    workers = max(1, min(parallel, len(task_ids)))
+    mode = f"（并行 {workers}）" if workers > 1 else ("（进程内）" if inproc else "")
+    print(f"运行 {len(task_ids)} 个验收脚本{mode}")
+
+    # 任务状态不在每个脚本结束时各自落盘，而是汇总后由主线程统一写回：
+    # 避免并行模式下多线程写文件，中断（Ctrl+C）时也会写回已完成的结果
+    results: list[tuple[str, bool]] = []
+    try:
+        if workers == 1:
+            for task_id in task_ids:
+                passed = run_single_verify(
+                    project_dir, iteration_id, task_id,
+                    log_path=logs_dir / f"{task_id}.log", update_status=False,
+                    inproc=inproc,
+                )
+                results.append((task_id, passed))
+        else:
+            def _run(task_id: str) -> tuple[bool, list[str]]:
+                buf: list[str] = []
+                passed = run_single_verify(
+                    project_dir, iteration_id, task_id,
+                    log=buf.append, log_path=logs_dir / f"{task_id}.log",
+                    update_status=False,
+                )
+                return passed, buf
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map 按提交顺序产出结果，前序 CR 完成即可输出，无需等待全部结束
+                for task_id, (passed, buf) in zip(task_ids, executor.map(_run, task_ids)):
+                    print("\n".join(buf))
+                    results.append((task_id, passed))
+    finally:
+        if results:
+            print(f"\n更新任务状态 ({len(results)} 个)")
+            for task_id, passed in results:
+                update_task_criteria(project_dir, iteration_id, task_id, passed)
 
     # 汇总
     print(f"\n{'='*50}")
@@ -181,7 +411,7 @@ def dry_run_verify(project_dir: Path, iteration_id: str, task_id: str | None) ->
     if task_id and task_id != "__ALL__":
         scripts = [verify_dir / f"{task_id}.py"]
     else:
-        scripts = sorted(verify_dir.glob("*.py"))
+        scripts = [Path(e.path) for e in scan_files(verify_dir, ".py")]
 
     if not scripts:
         print(f"[WARN] 无 verify 脚本可检查")
@@ -236,16 +466,19 @@ def dry_run_verify(project_dir: Path, iteration_id: str, task_id: str | None) ->
 
 
 def generate_skeleton(
-    project_dir: Path, iteration_id: str, task_id: str
+    project_dir: Path, iteration_id: str, task_id: str, precompile: bool = True,
 ) -> None:
     """从任务 YAML 的 acceptance_criteria 自动生成 verify 脚本骨架。
 
     骨架包含每条 criteria 对应的 verify 函数（含 NotImplementedError 占位）
     和 done_evidence 自动收集逻辑。analyst 子代理必须检查并补全业务验证逻辑。
+    precompile=True 时写入后立即 py_compile，尽早暴露生成代码的语法问题。
 
     参考模板：templates/verify/verify-task.py.tmpl
     """
-    import yaml
+    if get_yaml() is None:
+        print("[ERROR] PyYAML 未安装。运行: pip install PyYAML>=6.0")
+        sys.exit(1)
 
     task_path = (
         project_dir
@@ -260,7 +493,7 @@ def generate_skeleton(
         print(f"错误: 任务文件不存在: {task_path}")
         sys.exit(1)
 
-    task = yaml.safe_load(task_path.read_text(encoding="utf-8"))
+    task = load_yaml_cached(task_path)
     raw_ac = task.get("acceptance_criteria", [])
     title = task.get("title", "未知任务")
 
@@ -277,124 +510,65 @@ def generate_skeleton(
         print(f"错误: {task_id} 无 acceptance_criteria")
         sys.exit(1)
 
-    # 生成脚本
-    from datetime import datetime, timezone
-
-    now = datetime.now(timezone.utc).isoformat()
-    lines = [
-        '#!/usr/bin/env python3',
-        '"""',
-        f'{task_id} 验收脚本',
-        f'需求: {title}',
-        f'生成时间: {now}',
-        '',
-        '此脚本骨架由 run-verify.py --generate-skeleton 自动生成。',
-        'analyst 子代理必须补全每个 verify 函数的业务验证逻辑。',
-        'developer 子代理和 verifier 子代理不可修改此脚本。',
-        '零 Mock，使用真实环境验证。',
-        '"""',
-        '',
-        'import json',
-        'import sys',
-        'import traceback',
-        'from datetime import datetime, timezone',
-        '',
-    ]
-
-    # 生成每个 criteria 的 verify 函数
-    for i, ac in enumerate(criteria):
-        ac_id = ac.get("id", f"{task_id}-AC{i+1}")
-        ac_desc = ac.get("desc", f"验收标准 {i+1}")
-        lines.extend([
-            f'def verify_{ac_id.lower().replace("-", "_")}():',
-            f'    """{ac_desc}"""',
-            f'    # TODO: analyst 子代理必须补全此函数的验证逻辑',
-            f'    raise NotImplementedError("analyst 子代理必须补全: {ac_desc}")',
-            '',
-        ])
-
-    # 生成 collect_evidence 函数
-    lines.extend([
-        '',
-        'def collect_evidence(results, task_id):',
-        '    """收集 done_evidence（供 Verifier 使用）"""',
-        '    timestamp = datetime.now(timezone.utc).isoformat()',
-        '    passed = sum(1 for _, s, _, _ in results if s == "PASS")',
-        '    total = len(results)',
-        '    return {',
-        '        "tests": [f"{task_id} verify: {passed}/{total} PASS ({timestamp})"],',
-        '        "logs": [f"{ac_id}: {status} - {desc}" for ac_id, status, desc, _ in results],',
-        '        "notes": ["全部通过" if passed == total else "存在失败项，需要修复"],',
-        '    }',
-        '',
-    ])
-
-    # 生成 main
-    criteria_list = []
+    items = []
     for i, ac in enumerate(criteria):
         ac_id = ac.get("id", f"{task_id}-AC{i+1}")
         ac_desc = ac.get("desc", f"验收标准 {i+1}")
         func_name = f'verify_{ac_id.lower().replace("-", "_")}'
-        criteria_list.append(f'        ("{ac_id}", "{ac_desc}", {func_name}),')
-
-    lines.extend([
-        '',
-        'def main():',
-        '    results = []',
-        '    criteria = [',
-    ])
-    lines.extend(criteria_list)
-    lines.extend([
-        '    ]',
-        '',
-        '    for ac_id, desc, fn in criteria:',
-        '        try:',
-        '            fn()',
-        '            results.append((ac_id, "PASS", desc, ""))',
-        '            print(f"  [PASS]  {ac_id}: {desc}")',
-        '        except AssertionError as e:',
-        '            results.append((ac_id, "FAIL", desc, str(e)))',
-        '            print(f"  [FAIL]  {ac_id}: {desc}")',
-        '            print(f"        原因: {e}")',
-        '        except NotImplementedError as e:',
-        '            results.append((ac_id, "ERROR", desc, str(e)))',
-        '            print(f"  [ERROR] {ac_id}: {desc}")',
-        '            print(f"        未实现: {e}")',
-        '        except Exception as e:',
-        '            results.append((ac_id, "ERROR", desc, traceback.format_exc()))',
-        '            print(f"  [ERROR] {ac_id}: {desc}")',
-        '            print(f"        异常: {e}")',
-        '',
-        '    passed = sum(1 for _, s, _, _ in results if s == "PASS")',
-        '    total = len(results)',
-        '    print("\\n" + "=" * 50)',
-        f'    print(f"{task_id} 验收结果: {{passed}}/{{total}} PASS")',
-        '',
-        '    # 输出 done_evidence JSON（供 Verifier 解析）',
-        f'    evidence = collect_evidence(results, "{task_id}")',
-        '    print(f"\\n--- EVIDENCE_JSON ---")',
-        '    print(json.dumps(evidence, indent=2, ensure_ascii=False))',
-        '    print(f"--- END_EVIDENCE ---")',
-        '',
-        '    if passed < total:',
-        '        sys.exit(1)',
-        '    else:',
-        '        print("\\n全部通过!")',
-        '        sys.exit(0)',
-        '',
-        '',
-        'if __name__ == "__main__":',
-        '    main()',
-    ])
-
+        items.append((ac_id, ac_desc, func_name))
+
+    # 骨架第二行记录 title + criteria 的摘要；任务未变化时跳过重写，避免覆盖已补全的脚本
+    payload_hash = hashlib.blake2b(
+        json.dumps(
+            {"title": title, "criteria": [(ac_id, desc) for ac_id, desc, _ in items]},
+            ensure_ascii=False,
+        ).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
     verify_dir = (
         project_dir / ".claude" / "dev-state" / iteration_id / "verify"
     )
-    verify_dir.mkdir(parents=True, exist_ok=True)
     verify_path = verify_dir / f"{task_id}.py"
-    verify_path.write_text('\n'.join(lines), encoding="utf-8")
+    try:
+        with open(verify_path, "rb") as fh:
+            head = fh.read(200)
+    except FileNotFoundError:
+        head = b""
+    if f"SKELETON_HASH: {payload_hash}".encode("ascii") in head:
+        print(f"骨架脚本未变化，跳过生成: {verify_path}")
+        return
+
+    # 生成脚本
+    from datetime import datetime, timezone
+
+    now = datetime.now(timezone.utc).isoformat()
+
+    verify_fns = "".join(
+        _SKELETON_VERIFY_FN.format(func_name=func_name, desc=desc)
+        for _, desc, func_name in items
+    )
+    rows = "".join(
+        _SKELETON_CRITERIA_ROW.format(ac_id=ac_id, desc=desc, func_name=func_name)
+        for ac_id, desc, func_name in items
+    )
+    content = (
+        _SKELETON_HEADER.format(
+            payload_hash=payload_hash, task_id=task_id, title=title, now=now,
+        )
+        + verify_fns
+        + _SKELETON_FOOTER.format(task_id=task_id, rows=rows)
+    )
+
+    verify_dir.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(verify_path, content)
 
     print(f"骨架脚本已生成: {verify_path}")
+    if precompile:
+        # desc/title 中的引号、反斜杠等会原样进入骨架，生成后立即编译检查
+        try:
+            py_compile.compile(str(verify_path), doraise=True)
+        except py_compile.PyCompileError as e:
+            print(f"[WARN] 骨架脚本编译失败，请检查任务 title/desc 中的特殊字符:\n{e.msg}")
     print(f"包含 {len(criteria)} 个验收函数 + done_evidence 收集逻辑")
     print(f"\n注意: analyst 子代理必须检查并补全每个 verify 函数的业务验证逻辑！")
     print(f"骨架中的 NotImplementedError 会导致运行时直接报错。")
@@ -420,11 +594,32 @@ def main() -> None:
         metavar="TASK_ID",
         help="预验证 verify 脚本（不执行业务逻辑）。省略 TASK_ID 时检查全部",
     )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        metavar="N",
+        help="--all 模式下并发运行的验收脚本数（默认 1，即串行）",
+    )
+    parser.add_argument(
+        "--no-precompile",
+        action="store_true",
+        help="--generate-skeleton 后不执行 py_compile（__pycache__ 不可写时使用）",
+    )
+    parser.add_argument(
+        "--inproc",
+        action="store_true",
+        help="在当前进程内执行验收脚本（runpy），省去每个脚本的解释器启动；不支持超时和 --parallel",
+    )
 
     args = parser.parse_args()
     project_dir = Path(args.project_dir).resolve()
     if not project_dir.is_dir():
         sys.exit(f"ERROR: --project-dir 目录不存在: {project_dir}")
+    if args.parallel < 1:
+        sys.exit(f"ERROR: --parallel 必须 >= 1: {args.parallel}")
+    if args.inproc and args.parallel > 1:
+        sys.exit("ERROR: --inproc 不支持 --parallel（进程内执行共享 cwd 和标准输出）")
 
     # SEC01: 路径遍历检测
     validate_safe_id(args.iteration_id, "iteration-id")
@@ -440,11 +635,18 @@ def main() -> None:
         if not passed:
             sys.exit(1)
     elif args.generate_skeleton:
-        generate_skeleton(project_dir, args.iteration_id, args.generate_skeleton)
+        generate_skeleton(
+            project_dir, args.iteration_id, args.generate_skeleton,
+            precompile=not args.no_precompile,
+        )
     elif args.all:
-        run_all_verify(project_dir, args.iteration_id)
+        run_all_verify(
+            project_dir, args.iteration_id, parallel=args.parallel, inproc=args.inproc,
+        )
     else:
-        passed = run_single_verify(project_dir, args.iteration_id, args.task_id)
+        passed = run_single_verify(
+            project_dir, args.iteration_id, args.task_id, inproc=args.inproc,
+        )
         if not passed:
             sys.exit(1)
 
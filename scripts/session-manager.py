@@ -18,45 +18,185 @@ session-manager.py — Session 状态管理工具
 from __future__ import annotations
 
 import argparse
-import json
+import copy
+import functools
+import os
 import re
-import subprocess
+import shutil
 import sys
-from datetime import datetime, timezone
+from collections import defaultdict
 from pathlib import Path
 
 # 添加 scripts 目录到 path 以导入 fw_utils
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from fw_utils import PHASE_ORDER
+from fw_utils import (
+    PHASE_INDEX, PHASE_ORDER, atomic_open, atomic_write_text, dump_session_state, get_yaml, json_dumps, json_loads,
+    load_yaml_cached, scan_files, utc_isoformat,
+)
 
-try:
-    import yaml
-except ImportError:
-    print("[ERROR] PyYAML 未安装。运行: pip install PyYAML>=6.0")
-    sys.exit(1)
+
+# 任务摘要字段：session-manager 各命令只用到这些字段，索引中仅缓存它们
+_TASK_INDEX_FIELDS = ("id", "title", "status", "owner", "current_step")
+# 任务摘要索引（纯派生缓存，可随时删除；框架 .gitignore 规则已排除）
+_TASK_INDEX_NAME = ".tasks-index.cache.json"
+
+# 检查点 / ledger 文件名中的序号
+_CP_SEQ_RE = re.compile(r"cp-(\d+)")
+_LEDGER_SEQ_RE = re.compile(r"session-\d{8}-(\d+)")
+
+# ledger 中列出的任务状态（Team 子任务已认领或已产出）
+_LEDGER_STATUSES = frozenset({"in_progress", "ready_for_verify", "ready_for_review", "PASS", "rework"})
+
+
+def _parse_task_summary(item: tuple[Path, os.stat_result]) -> dict | None | bool:
+    """解析单个任务文件并提取索引字段；解析失败时告警并返回 False。"""
+    path, st = item
+    try:
+        task = load_yaml_cached(path, st)
+    except Exception as e:
+        print(f"  WARN: 解析 {path} 失败: {e}", file=sys.stderr)
+        return False
+    if isinstance(task, dict) and task:
+        return {k: task[k] for k in _TASK_INDEX_FIELDS if k in task}
+    return None
+
+
+def _read_task_index(index_path: Path) -> tuple[dict, int]:
+    """读取任务摘要索引，返回 (条目字典, 索引文件 mtime_ns)；缺失或结构异常时返回 ({}, 0)。"""
+    try:
+        with open(index_path, "rb") as fh:
+            index_mtime_ns = os.fstat(fh.fileno()).st_mtime_ns
+            data = json_loads(fh.read())
+    except (OSError, ValueError):
+        return {}, 0
+    cached = data.get("tasks") if isinstance(data, dict) else None
+    if not isinstance(cached, dict):
+        return {}, 0
+    return cached, index_mtime_ns
+
+
+def _index_hit(hit, st: os.stat_result, index_mtime_ns: int) -> bool:
+    """判断索引条目是否可直接复用。
+
+    除 (mtime_ns, size) 一致外，还要求任务文件 mtime 早于索引文件本身的 mtime：
+    与索引写入落在同一时间戳刻度内的条目（粗粒度文件系统或同一 tick 内的两次写入，
+    如 FAIL/PASS 这类等长改写）无法靠 mtime 区分，按 git 的 racy 处理重新解析。
+    """
+    return (
+        isinstance(hit, dict)
+        and hit.get("mtime_ns") == st.st_mtime_ns
+        and hit.get("size") == st.st_size
+        and st.st_mtime_ns < index_mtime_ns
+        and isinstance(hit.get("task", False), (dict, type(None)))
+    )
 
 
 def _load_tasks(tasks_dir: Path) -> list[dict]:
-    """加载指定目录下的所有任务 YAML 文件，返回字典列表。"""
+    """加载指定目录下所有任务的摘要字段，返回字典列表。
+
+    解析结果缓存在迭代目录的 .tasks-index.cache.json 中，以 (mtime_ns, size) 校验：
+    只有新增、变更过或与索引写入时间过近的任务文件才会重新解析 YAML。
+    索引只是派生缓存，结构损坏时按未命中处理。
+    """
     tasks: list[dict] = []
-    if not tasks_dir.exists():
+    if not tasks_dir.is_dir():
         return tasks
-    for f in sorted(tasks_dir.glob("*.yaml")):
+
+    index_path = tasks_dir.parent / _TASK_INDEX_NAME
+    cached, index_mtime_ns = _read_task_index(index_path)
+
+    entries = scan_files(tasks_dir, ".yaml")
+    stats = [entry.stat() for entry in entries]
+    misses = []
+    for entry, st in zip(entries, stats):
+        if not _index_hit(cached.get(entry.name), st, index_mtime_ns):
+            misses.append((Path(entry.path), st))
+
+    parsed: dict[str, dict | None] = {}
+    if misses:
+        # PyYAML 只在索引未命中时才需要（按需导入）
+        if get_yaml() is None:
+            print("[ERROR] PyYAML 未安装。运行: pip install PyYAML>=6.0")
+            sys.exit(1)
+        if len(misses) > 1:
+            # 冷启动时多个文件同时未命中：并行读取+解析，缩短磁盘/网络挂载的等待
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(8, len(misses))) as ex:
+                results = list(ex.map(_parse_task_summary, misses))
+        else:
+            results = [_parse_task_summary(misses[0])]
+        parsed = {path.name: summary for (path, _), summary in zip(misses, results)}
+
+    index: dict[str, dict] = {}
+    for entry, st in zip(entries, stats):
+        if entry.name in parsed:
+            summary = parsed[entry.name]
+            if summary is False:
+                continue
+            index[entry.name] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "task": summary}
+        else:
+            index[entry.name] = cached[entry.name]
+        # 不含摘要字段的任务摘要为 {}，仍计入任务总数；None 表示空文件/非字典
+        if index[entry.name]["task"] is not None:
+            tasks.append(index[entry.name]["task"])
+
+    changed = bool(parsed)
+    if changed or index.keys() != cached.keys():
         try:
-            task = yaml.safe_load(f.read_text(encoding="utf-8"))
-            if task:
-                tasks.append(task)
-        except Exception as e:
-            print(f"  WARN: 解析 {f} 失败: {e}", file=sys.stderr)
+            atomic_write_text(
+                index_path,
+                json_dumps({"tasks": index}, default=str),
+            )
+        except OSError as e:
+            print(f"  WARN: 写入 {index_path} 失败: {e}", file=sys.stderr)
     return tasks
 
 
+@functools.lru_cache(maxsize=16)
+def _parse_state_file(path_str: str, mtime_ns: int, size: int):
+    """解析 session-state.json。mtime_ns/size 仅作为缓存键，文件变更后自动失效。"""
+    with open(path_str, "rb") as fh:
+        return json_loads(fh.read())
+
+
+def _load_state(state_path: Path, missing_msg: str) -> dict | None:
+    """读取 session-state.json，返回可自由修改的副本；缺失或损坏时打印提示并返回 None。
+
+    直接 stat 判断文件是否存在（不再 exists() + 读取两次访问），
+    解析结果按 (mtime_ns, size) 缓存，同一进程内多次调用不重复读取。
+    """
+    try:
+        st = state_path.stat()
+    except FileNotFoundError:
+        print(missing_msg)
+        return None
+    try:
+        return copy.deepcopy(_parse_state_file(str(state_path), st.st_mtime_ns, st.st_size))
+    except (ValueError, OSError) as e:
+        print(f"[ERROR] session-state.json 读取/解析失败: {e}")
+        return None
+
+
+def _max_seq(paths, pattern: re.Pattern) -> int:
+    """单次遍历返回文件名中 pattern 匹配到的最大序号，无匹配返回 0。"""
+    matches = (pattern.search(p.stem) for p in paths)
+    return max((int(m.group(1)) for m in matches if m), default=0)
+
+
+def _group_by_status(tasks: list[dict]) -> defaultdict[str, list[dict]]:
+    """单次遍历按 status 分组任务（保持原顺序），不存在的状态得到空列表。"""
+    buckets: defaultdict[str, list[dict]] = defaultdict(list)
+    for t in tasks:
+        buckets[t.get("status")].append(t)
+    return buckets
+
+
 def validate_phase_transition(current: str, target: str) -> tuple[bool, str]:
     """校验 Phase 转换是否合法。返回 (合法, 原因)。"""
-    if current not in PHASE_ORDER or target not in PHASE_ORDER:
+    curr_idx = PHASE_INDEX.get(current)
+    target_idx = PHASE_INDEX.get(target)
+    if curr_idx is None or target_idx is None:
         return False, f"未知 Phase: {current} → {target}"
-    curr_idx = PHASE_ORDER.index(current)
-    target_idx = PHASE_ORDER.index(target)
     # 正常前进（+1）
     if target_idx == curr_idx + 1:
         return True, "正常前进"
@@ -76,14 +216,8 @@ def cmd_status(project_dir: Path) -> None:
     dev_state = project_dir / ".claude" / "dev-state"
     state_path = dev_state / "session-state.json"
 
-    if not state_path.exists():
-        print("无 session 状态文件。请先运行 init-project.py 或 init-iteration.py。")
-        return
-
-    try:
-        state = json.loads(state_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError) as e:
-        print(f"[ERROR] session-state.json 读取/解析失败: {e}")
+    state = _load_state(state_path, "无 session 状态文件。请先运行 init-project.py 或 init-iteration.py。")
+    if state is None:
         return
 
     print(f"Session: {state.get('session_id', '?')}")
@@ -106,7 +240,7 @@ def cmd_status(project_dir: Path) -> None:
 
     # 输出当前 Phase 的合法下一步
     current_phase = state.get("current_phase", "")
-    if current_phase and current_phase in PHASE_ORDER:
+    if current_phase and current_phase in PHASE_INDEX:
         valid_next = []
         for candidate in PHASE_ORDER:
             ok, reason = validate_phase_transition(current_phase, candidate)
@@ -118,35 +252,42 @@ def cmd_status(project_dir: Path) -> None:
                 print(f"  → {v}")
 
 
+def _patch_state(state_path: Path, patch: dict) -> None:
+    """把本命令修改过的顶层字段合并写回 session-state.json。
+
+    写回前重新读取磁盘上的最新内容，只覆盖 patch 中的字段，
+    不会冲掉命令执行期间其他脚本写入的其余字段；合并结果与磁盘内容一致时不写文件。
+    """
+    try:
+        old_text = state_path.read_text(encoding="utf-8")
+        state = json_loads(old_text)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] session-state.json 读取/解析失败，未更新: {e}")
+        return
+    state.update(patch)
+    new_text = dump_session_state(state)
+    if new_text != old_text:
+        atomic_write_text(state_path, new_text)
+
+
 def cmd_checkpoint(project_dir: Path) -> None:
     """写入检查点"""
     dev_state = project_dir / ".claude" / "dev-state"
     state_path = dev_state / "session-state.json"
 
-    if not state_path.exists():
-        print("无 session 状态文件")
-        return
-
-    try:
-        state = json.loads(state_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError) as e:
-        print(f"[ERROR] session-state.json 读取/解析失败: {e}")
+    state = _load_state(state_path, "无 session 状态文件")
+    if state is None:
         return
     iteration_id = state.get("current_iteration", "unknown")
     cp_dir = dev_state / iteration_id / "checkpoints"
     cp_dir.mkdir(parents=True, exist_ok=True)
 
-    # 找到下一个检查点编号（取现有最大编号+1，避免删除后编号冲突）
-    existing = sorted(cp_dir.glob("cp-*.md"))
-    if existing:
-        nums = []
-        for f in existing:
-            m = re.search(r"cp-(\d+)", f.stem)
-            if m:
-                nums.append(int(m.group(1)))
-        next_num = max(nums) + 1 if nums else 1
-    else:
-        next_num = 1
+    # 下一个检查点编号 = max(session-state 中按迭代记录的计数器, 目录中现有最大编号) + 1：
+    # 计数器落后于磁盘（恢复/手改 session-state、删除中间检查点）时不会写出比最新文件更小的编号，
+    # 删除最新检查点后计数器也保证编号不回退复用
+    cp_seq = state.setdefault("checkpoint_seq", {})
+    next_num = max(cp_seq.get(iteration_id, 0), _max_seq(cp_dir.glob("cp-*.md"), _CP_SEQ_RE)) + 1
+    cp_seq[iteration_id] = next_num
     cp_name = f"cp-{next_num:03d}"
 
     # 加载任务
@@ -154,12 +295,13 @@ def cmd_checkpoint(project_dir: Path) -> None:
     tasks = _load_tasks(tasks_dir)
 
     # 生成检查点
-    now = datetime.now(timezone.utc).isoformat()
-    completed_tasks = [t for t in tasks if t.get("status") == "PASS"]
-    in_progress_tasks = [t for t in tasks if t.get("status") == "in_progress"]
-    pending_tasks = [t for t in tasks if t.get("status") == "pending"]
+    now = utc_isoformat()
+    by_status = _group_by_status(tasks)
+    completed_tasks = by_status["PASS"]
+    in_progress_tasks = by_status["in_progress"]
+    pending_tasks = by_status["pending"]
 
-    cp_content = f"""# Checkpoint {cp_name} — {now}
+    parts = [f"""# Checkpoint {cp_name} — {now}
 
 ## 当前状态
 - 迭代: {iteration_id}
@@ -167,22 +309,20 @@ def cmd_checkpoint(project_dir: Path) -> None:
 - 进度: {len(completed_tasks)}/{len(tasks)} CR 完成
 
 ## 已完成
-"""
-    for t in completed_tasks:
-        cp_content += f"- {t.get('id', '?')}: {t.get('title', '?')} (PASS)\n"
-
-    cp_content += "\n## 进行中\n"
-    for t in in_progress_tasks:
-        cp_content += f"- {t.get('id', '?')}: {t.get('title', '?')} ({t.get('owner', '?')})\n"
-
-    cp_content += "\n## 待开始\n"
-    for t in pending_tasks:
-        cp_content += f"- {t.get('id', '?')}: {t.get('title', '?')}\n"
-
-    cp_content += f"\n## 下一步\n- (由 Leader 填写)\n"
+"""]
+    parts.extend(f"- {t.get('id', '?')}: {t.get('title', '?')} (PASS)\n" for t in completed_tasks)
+    parts.append("\n## 进行中\n")
+    parts.extend(
+        f"- {t.get('id', '?')}: {t.get('title', '?')} ({t.get('owner', '?')})\n"
+        for t in in_progress_tasks
+    )
+    parts.append("\n## 待开始\n")
+    parts.extend(f"- {t.get('id', '?')}: {t.get('title', '?')}\n" for t in pending_tasks)
+    parts.append("\n## 下一步\n- (由 Leader 填写)\n")
+    cp_content = "".join(parts)
 
     cp_path = cp_dir / f"{cp_name}.md"
-    cp_path.write_text(cp_content, encoding="utf-8")
+    atomic_write_text(cp_path, cp_content)
 
     # 更新 session-state
     state["last_checkpoint"] = f"{cp_name}.md"
@@ -192,8 +332,8 @@ def cmd_checkpoint(project_dir: Path) -> None:
     count_completed = len(completed_tasks)
     count_in_progress = len(in_progress_tasks)
     count_pending = len(pending_tasks)
-    count_rework = sum(1 for t in tasks if t.get("status") == "rework")
-    count_failed = sum(1 for t in tasks if t.get("status") == "failed")
+    count_rework = len(by_status["rework"])
+    count_failed = len(by_status["failed"])
     state.setdefault("progress", {})
     state["progress"]["total_tasks"] = len(tasks)
     state["progress"]["completed"] = count_completed
@@ -213,11 +353,11 @@ def cmd_checkpoint(project_dir: Path) -> None:
         pending_list = ", ".join(t.get("id", "?") for t in pending_tasks) or "无"
 
         # verifier/reviewer 子代理状态统计
-        ready_verify = [t for t in tasks if t.get("status") == "ready_for_verify"]
-        ready_review = [t for t in tasks if t.get("status") == "ready_for_review"]
-        rework_tasks = [t for t in tasks if t.get("status") == "rework"]
-        failed_tasks = [t for t in tasks if t.get("status") == "failed"]
-        blocked_tasks = [t for t in tasks if t.get("status") == "blocked"]
+        ready_verify = by_status["ready_for_verify"]
+        ready_review = by_status["ready_for_review"]
+        rework_tasks = by_status["rework"]
+        failed_tasks = by_status["failed"]
+        blocked_tasks = by_status["blocked"]
 
         ready_verify_list = ", ".join(t.get("id", "?") for t in ready_verify) or "无"
         ready_review_list = ", ".join(t.get("id", "?") for t in ready_review) or "无"
@@ -242,9 +382,12 @@ def cmd_checkpoint(project_dir: Path) -> None:
             f"## 下一步\n"
             f"- (由 checkpoint 自动更新，详细上下文由 Agent 手动维护)\n"
         )
-        snapshot_path.write_text(snapshot_content, encoding="utf-8")
+        atomic_write_text(snapshot_path, snapshot_content)
 
-    state_path.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    _patch_state(
+        state_path,
+        {k: state[k] for k in ("last_checkpoint", "last_updated", "progress", "checkpoint_seq")},
+    )
 
     print(f"检查点已写入: {cp_path}")
 
@@ -254,21 +397,27 @@ def determine_next_action(state: dict, tasks: list[dict]) -> str:
     phase = state.get("current_phase", "phase_0")
     current_task = state.get("current_task")
 
-    if current_task:
-        for t in tasks:
-            if t.get("id") == current_task:
-                status = t.get("status", "pending")
-                if status == "in_progress":
-                    step = t.get("current_step", "coding")
-                    return f"继续 {current_task}（当前步骤: {step}）"
-                elif status == "rework":
-                    return f"修复 {current_task}（被打回 rework）"
+    # 单次遍历：按 status 分组，同时找出仍在进行/返工中的当前任务
+    by_status: defaultdict[str, list[dict]] = defaultdict(list)
+    current = None
+    for t in tasks:
+        status = t.get("status")
+        by_status[status].append(t)
+        if (current is None and current_task and t.get("id") == current_task
+                and status in ("in_progress", "rework")):
+            current = t
+
+    if current is not None:
+        if current["status"] == "in_progress":
+            step = current.get("current_step", "coding")
+            return f"继续 {current_task}（当前步骤: {step}）"
+        return f"修复 {current_task}（被打回 rework）"
 
     # 找下一个可做的任务
-    pending = [t for t in tasks if t.get("status") == "pending"]
-    rework = [t for t in tasks if t.get("status") == "rework"]
-    ready_verify = [t for t in tasks if t.get("status") == "ready_for_verify"]
-    ready_review = [t for t in tasks if t.get("status") == "ready_for_review"]
+    pending = by_status["pending"]
+    rework = by_status["rework"]
+    ready_verify = by_status["ready_for_verify"]
+    ready_review = by_status["ready_for_review"]
 
     if rework:
         return f"优先处理返工任务: {rework[0].get('id', '?')}"
@@ -279,7 +428,7 @@ def determine_next_action(state: dict, tasks: list[dict]) -> str:
     if pending:
         return f"认领下一个任务: {pending[0].get('id', '?')}"
 
-    all_pass = all(t.get("status") == "PASS" for t in tasks) if tasks else False
+    all_pass = bool(tasks) and len(by_status["PASS"]) == len(tasks)
     if all_pass:
         return f"所有 CR 已通过，进入 Phase 5 交付"
 
@@ -302,27 +451,57 @@ def determine_blockers(state: dict, tasks: list[dict]) -> str:
     return "; ".join(blockers) if blockers else ""
 
 
+def _has_content(path: Path, min_chars: int = 50) -> bool:
+    """文件非空白且超过 min_chars 个字符时返回 True；分块读取，命中即停。"""
+    total = 0
+    non_blank = False
+    with open(path, encoding="utf-8") as fh:
+        for chunk in iter(lambda: fh.read(65536), ""):
+            total += len(chunk)
+            non_blank = non_blank or bool(chunk.strip())
+            if non_blank and total > min_chars:
+                return True
+    return False
+
+
+def _git_recent_log(project_dir: Path) -> str:
+    """返回最近 10 条 git 提交（oneline）；非 git 仓库或 git 不可用时返回空串。"""
+    import subprocess
+
+    try:
+        git_log = subprocess.run(
+            ["git", "log", "--oneline", "-10"],
+            cwd=project_dir,
+            capture_output=True, text=True, timeout=10,
+            encoding="utf-8", errors="replace",
+        )
+    except Exception:
+        return ""
+    return git_log.stdout.strip() if git_log.returncode == 0 else ""
+
+
 def cmd_resume(project_dir: Path) -> None:
     """生成恢复上下文摘要（v2.6 FIX-06 重构：精简输出 + 详细版分离）
 
     精简版（直接打印）：5 行结论式摘要
     详细版（写入文件）：完整恢复信息供需要时查阅
     """
+    from concurrent.futures import ThreadPoolExecutor
+
     dev_state = project_dir / ".claude" / "dev-state"
     state_path = dev_state / "session-state.json"
 
-    if not state_path.exists():
-        print("无 session 状态。这是一个全新的 session。")
-        return
-
-    try:
-        state = json.loads(state_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError) as e:
-        print(f"[ERROR] session-state.json 读取/解析失败: {e}")
+    state = _load_state(state_path, "无 session 状态。这是一个全新的 session。")
+    if state is None:
         return
     iteration_id = state.get("current_iteration", "unknown")
     iter_dir = dev_state / iteration_id
 
+    # git log 只是等待子进程，放到后台线程，与下面的任务加载、文件读取重叠执行
+    executor = ThreadPoolExecutor(max_workers=1)
+    git_future = executor.submit(_git_recent_log, project_dir)
+    executor.shutdown(wait=False)
+
     # 加载任务
     tasks_dir = iter_dir / "tasks"
     tasks = _load_tasks(tasks_dir)
@@ -342,7 +521,8 @@ def cmd_resume(project_dir: Path) -> None:
     print(summary)
 
     # ──── 详细版写入文件 ────
-    detail_lines: list[str] = []
+    # 元素为 str 时原样写入，为 Path 时流式拷贝文件内容（检查点、决策记录可能很大）
+    detail_lines: list[str | Path] = []
     detail_lines.append("# 恢复摘要（详细版）\n")
     detail_lines.append(summary)
 
@@ -358,38 +538,33 @@ def cmd_resume(project_dir: Path) -> None:
     # 最新检查点
     cp_dir = iter_dir / "checkpoints"
     if cp_dir.exists():
-        cps = sorted(cp_dir.glob("cp-*.md"))
-        if cps:
-            detail_lines.append(f"\n## 最新检查点 ({cps[-1].name})")
-            detail_lines.append(cps[-1].read_text(encoding="utf-8"))
+        # 按编号数值取最新（cp-1000 按文件名排序会落在 cp-999 之前）
+        last_cp = max(
+            (p for p in cp_dir.glob("cp-*.md") if _CP_SEQ_RE.search(p.stem)),
+            key=lambda p: int(_CP_SEQ_RE.search(p.stem).group(1)),
+            default=None,
+        )
+        if last_cp is not None:
+            detail_lines.append(f"\n## 最新检查点 ({last_cp.name})")
+            detail_lines.append(last_cp)
 
     # 关键决策
     decisions_path = iter_dir / "decisions.md"
-    if decisions_path.exists():
-        decisions = decisions_path.read_text(encoding="utf-8")
-        if decisions.strip() and len(decisions) > 50:
-            detail_lines.append("\n## 关键决策")
-            detail_lines.append(decisions)
+    if decisions_path.exists() and _has_content(decisions_path):
+        detail_lines.append("\n## 关键决策")
+        detail_lines.append(decisions_path)
 
     # Git 最近提交
-    try:
-        git_log = subprocess.run(
-            ["git", "log", "--oneline", "-10"],
-            cwd=project_dir,
-            capture_output=True, text=True, timeout=10,
-            encoding="utf-8", errors="replace",
-        )
-        if git_log.returncode == 0 and git_log.stdout.strip():
-            detail_lines.append("\n## 最近 Git 提交")
-            detail_lines.append(git_log.stdout.strip())
-    except Exception:
-        pass
+    git_log = git_future.result()
+    if git_log:
+        detail_lines.append("\n## 最近 Git 提交")
+        detail_lines.append(git_log)
 
     # 基线测试摘要
     baseline_path = dev_state / "baseline.json"
     if baseline_path.exists():
         try:
-            baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+            baseline = json_loads(baseline_path.read_bytes())
             test_results = baseline.get("test_results", {})
             detail_lines.append("\n## 基线状态")
             detail_lines.append(f"  L1 passed: {test_results.get('l1_passed', '?')}")
@@ -401,7 +576,16 @@ def cmd_resume(project_dir: Path) -> None:
     # 写入详细版
     summary_path = iter_dir / "resume-summary.md"
     if iter_dir.exists():
-        summary_path.write_text("\n".join(detail_lines), encoding="utf-8")
+        # 内容未变化时不重写，避免无谓地刷新 mtime 触发编辑器/监听器
+        with atomic_open(summary_path, skip_unchanged=True) as out:
+            for i, part in enumerate(detail_lines):
+                if i:
+                    out.write("\n")
+                if isinstance(part, Path):
+                    with open(part, encoding="utf-8") as src:
+                        shutil.copyfileobj(src, out)
+                else:
+                    out.write(part)
         print(f"\n详细恢复摘要已写入: {summary_path}")
 
 
@@ -410,64 +594,59 @@ def cmd_ledger(project_dir: Path) -> None:
     dev_state = project_dir / ".claude" / "dev-state"
     state_path = dev_state / "session-state.json"
 
-    if not state_path.exists():
-        print("无 session 状态文件")
-        return
-
-    try:
-        state = json.loads(state_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError) as e:
-        print(f"[ERROR] session-state.json 读取/解析失败: {e}")
+    state = _load_state(state_path, "无 session 状态文件")
+    if state is None:
         return
     iteration_id = state.get("current_iteration", "unknown")
     ledger_dir = dev_state / iteration_id / "ledger"
     ledger_dir.mkdir(parents=True, exist_ok=True)
 
-    # 确定编号（取现有最大编号+1，避免删除后编号冲突）
-    now = datetime.now(timezone.utc)
-    date_str = now.strftime("%Y%m%d")
-    existing = sorted(ledger_dir.glob(f"session-{date_str}-*.md"))
-    if existing:
-        nums = []
-        for f in existing:
-            m = re.search(r"session-\d{8}-(\d+)", f.stem)
-            if m:
-                nums.append(int(m.group(1)))
-        seq = max(nums) + 1 if nums else 1
-    else:
-        seq = 1
+    # 确定编号：max(session-state 中按迭代记录的当日计数器, 目录中当日现有最大编号) + 1，
+    # 与检查点相同，计数器落后于磁盘时不会写出比最新 ledger 更小的编号；日期变化时计数器不参与
+    now = utc_isoformat()
+    date_str = now[:10].replace("-", "")
+    ledger_seq = state.setdefault("ledger_seq", {})
+    counter = ledger_seq.get(iteration_id) or {}
+    last_seq = counter.get("seq", 0) if counter.get("date") == date_str else 0
+    seq = max(last_seq, _max_seq(ledger_dir.glob(f"session-{date_str}-*.md"), _LEDGER_SEQ_RE)) + 1
+    ledger_seq[iteration_id] = {"date": date_str, "seq": seq}
 
     # 加载任务
     tasks_dir = dev_state / iteration_id / "tasks"
     tasks = _load_tasks(tasks_dir)
 
     # 生成 ledger 内容
-    content = f"# Session Ledger — {date_str}-{seq:02d}\n\n"
-    content += f"## 基本信息\n"
-    content += f"- iteration: {iteration_id}\n"
-    content += f"- phase: {state.get('current_phase', '?')}\n"
-    content += f"- timestamp: {now.isoformat()}\n\n"
-    content += f"## Team 子任务\n\n"
-    content += f"| Agent | CR | Status | Output |\n"
-    content += f"|-------|-----|--------|--------|\n"
+    parts = [
+        f"# Session Ledger — {date_str}-{seq:02d}\n\n",
+        "## 基本信息\n",
+        f"- iteration: {iteration_id}\n",
+        f"- phase: {state.get('current_phase', '?')}\n",
+        f"- timestamp: {now}\n\n",
+        "## Team 子任务\n\n",
+        "| Agent | CR | Status | Output |\n",
+        "|-------|-----|--------|--------|\n",
+    ]
 
     for t in tasks:
         status = t.get("status", "?")
-        if status in ("in_progress", "ready_for_verify", "ready_for_review", "PASS", "rework"):
+        if status in _LEDGER_STATUSES:
             owner = t.get("owner", "-")
             tid = t.get("id", "?")
             title = t.get("title", "?")[:40]
-            content += f"| {owner} | {tid} | {status} | {title} |\n"
+            parts.append(f"| {owner} | {tid} | {status} | {title} |\n")
 
-    content += f"\n## 决策记录\n- (由 Leader 填写)\n"
-    content += f"\n## 下一步行动\n- (由 Leader 填写)\n"
+    parts.append("\n## 决策记录\n- (由 Leader 填写)\n")
+    parts.append("\n## 下一步行动\n- (由 Leader 填写)\n")
+    content = "".join(parts)
 
     ledger_path = ledger_dir / f"session-{date_str}-{seq:02d}.md"
-    ledger_path.write_text(content, encoding="utf-8")
+    atomic_write_text(ledger_path, content)
 
     # 更新 session-state
-    state["last_updated"] = now.isoformat()
-    state_path.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    state["last_updated"] = now
+    _patch_state(
+        state_path, {k: state[k] for k in ("last_updated", "ledger_seq")},
+    )
 
     print(f"Session Ledger 已写入: {ledger_path}")
 
@@ -37,6 +37,7 @@ Exit codes:
 import argparse
 import json
 import os
+import re
 import sys
 
 try:
@@ -45,6 +46,15 @@ except ImportError:
     print("Error: PyYAML is required. Install with: pip install pyyaml", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import orjson  # optional C JSON decoder
+except ImportError:
+    orjson = None
+
+# Prefer the libyaml C implementation when PyYAML was built with it.
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 # ---------------------------------------------------------------------------
 # Field policies
@@ -67,6 +77,13 @@ BLACKLISTED_FIELDS = frozenset({
 
 DONE_EVIDENCE_REQUIRED_KEYS = {"tests", "logs", "notes"}
 
+# Allow-list for --iteration-id / --task-id (e.g. iter-1, CR-001). Rejects path
+# separators, NUL, drive letters, whitespace and any non-ASCII look-alikes.
+# Deliberately stricter than fw_utils.validate_safe_id (which only blocks "..",
+# "/" and "\\"): this script is driven by sub-agents, so IDs such as non-ASCII
+# iteration names that init-iteration / session-manager accept are refused here.
+_SAFE_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -78,10 +95,29 @@ def _resolve_task_path(project_dir: str, iteration_id: str, task_id: str) -> str
     )
 
 
+def _check_safe_id(label: str, value: str) -> None:
+    """Exit with code 1 unless value is a plain identifier usable as a path component."""
+    if not _SAFE_ID_RE.fullmatch(value) or ".." in value:
+        print(f"Error: {label} contains illegal characters: {value}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _json_loads(raw: str):
+    """Decode with orjson when installed, otherwise (or on failure) with stdlib json."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # stdlib json gives the familiar error message and also accepts
+            # NaN/Infinity, which orjson rejects.
+            pass
+    return json.loads(raw)
+
+
 def _parse_json_value(raw: str, field_name: str) -> dict:
     """Parse a JSON string and return a dict, or exit with code 1."""
     try:
-        obj = json.loads(raw)
+        obj = _json_loads(raw)
     except json.JSONDecodeError as exc:
         print(f"Error: --value for '{field_name}' is not valid JSON: {exc}", file=sys.stderr)
         sys.exit(1)
@@ -101,6 +137,66 @@ def _validate_done_evidence(obj: dict) -> None:
         sys.exit(1)
 
 
+def _check_allowed(field_name: str, raw_value: str, allowed: frozenset) -> None:
+    if raw_value not in allowed:
+        print(
+            f"Error: invalid {field_name} '{raw_value}'. "
+            f"Allowed: {', '.join(sorted(allowed))}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+def _apply_status(task_data: dict, raw_value: str) -> None:
+    _check_allowed("status", raw_value, ALLOWED_STATUS_VALUES)
+    task_data["status"] = raw_value
+
+
+def _apply_current_step(task_data: dict, raw_value: str) -> None:
+    _check_allowed("current_step", raw_value, ALLOWED_CURRENT_STEP_VALUES)
+    task_data["current_step"] = raw_value
+
+
+def _apply_done_evidence(task_data: dict, raw_value: str) -> None:
+    obj = _parse_json_value(raw_value, "done_evidence")
+    _validate_done_evidence(obj)
+    task_data["done_evidence"] = obj
+
+
+def _apply_review_result(task_data: dict, raw_value: str) -> None:
+    task_data["review_result"] = _parse_json_value(raw_value, "review_result")
+
+
+def _apply_notes(task_data: dict, raw_value: str) -> None:
+    existing = task_data.get("notes")
+    if existing is None:
+        task_data["notes"] = raw_value
+    elif isinstance(existing, list):
+        existing.append(raw_value)
+    elif isinstance(existing, str):
+        task_data["notes"] = existing + "\n" + raw_value
+    else:
+        # Unexpected type — convert to list and append
+        task_data["notes"] = [existing, raw_value]
+
+
+# One handler per writable field; keys must match WRITABLE_FIELDS.
+_FIELD_HANDLERS = {
+    "status": _apply_status,
+    "current_step": _apply_current_step,
+    "done_evidence": _apply_done_evidence,
+    "review_result": _apply_review_result,
+    "notes": _apply_notes,
+}
+
+# field -> (kind, handler): a single lookup decides protected / writable / unknown.
+# Blacklist entries are merged last so they win if a field ever appears in both sets.
+_FIELD_POLICY = {
+    **{f: ("writable", _FIELD_HANDLERS[f]) for f in WRITABLE_FIELDS},
+    **{f: ("blacklisted", None) for f in BLACKLISTED_FIELDS},
+}
+
+
 # ---------------------------------------------------------------------------
 # Core logic
 # ---------------------------------------------------------------------------
@@ -108,13 +204,15 @@ def _validate_done_evidence(obj: dict) -> None:
 def update_field(task_data: dict, field: str, raw_value: str) -> dict:
     """Validate and apply a single field update. Returns the modified task_data."""
 
+    kind, handler = _FIELD_POLICY.get(field, ("unknown", None))
+
     # --- Blacklist check ---
-    if field in BLACKLISTED_FIELDS:
+    if kind == "blacklisted":
         print(f"Error: field '{field}' is protected and cannot be written by sub-agents", file=sys.stderr)
         sys.exit(1)
 
     # --- Whitelist check ---
-    if field not in WRITABLE_FIELDS:
+    if kind != "writable":
         print(
             f"Error: field '{field}' is not in the writable whitelist. "
             f"Allowed fields: {', '.join(sorted(WRITABLE_FIELDS))}",
@@ -123,47 +221,7 @@ def update_field(task_data: dict, field: str, raw_value: str) -> dict:
         sys.exit(1)
 
     # --- Per-field validation & application ---
-
-    if field == "status":
-        if raw_value not in ALLOWED_STATUS_VALUES:
-            print(
-                f"Error: invalid status '{raw_value}'. "
-                f"Allowed: {', '.join(sorted(ALLOWED_STATUS_VALUES))}",
-                file=sys.stderr,
-            )
-            sys.exit(1)
-        task_data[field] = raw_value
-
-    elif field == "current_step":
-        if raw_value not in ALLOWED_CURRENT_STEP_VALUES:
-            print(
-                f"Error: invalid current_step '{raw_value}'. "
-                f"Allowed: {', '.join(sorted(ALLOWED_CURRENT_STEP_VALUES))}",
-                file=sys.stderr,
-            )
-            sys.exit(1)
-        task_data[field] = raw_value
-
-    elif field == "done_evidence":
-        obj = _parse_json_value(raw_value, field)
-        _validate_done_evidence(obj)
-        task_data[field] = obj
-
-    elif field == "review_result":
-        obj = _parse_json_value(raw_value, field)
-        task_data[field] = obj
-
-    elif field == "notes":
-        existing = task_data.get("notes")
-        if existing is None:
-            task_data["notes"] = raw_value
-        elif isinstance(existing, list):
-            existing.append(raw_value)
-        elif isinstance(existing, str):
-            task_data["notes"] = existing + "\n" + raw_value
-        else:
-            # Unexpected type — convert to list and append
-            task_data["notes"] = [existing, raw_value]
+    handler(task_data, raw_value)
 
     return task_data
 
@@ -180,24 +238,41 @@ def main() -> None:
     args = parser.parse_args()
 
     # 路径遍历校验
-    for _label, _val in [("iteration-id", args.iteration_id), ("task-id", args.task_id)]:
-        if ".." in _val or "/" in _val or "\\" in _val:
-            print(f"Error: {_label} contains illegal characters: {_val}", file=sys.stderr)
-            sys.exit(1)
+    _check_safe_id("iteration-id", args.iteration_id)
+    _check_safe_id("task-id", args.task_id)
 
     task_path = _resolve_task_path(args.project_dir, args.iteration_id, args.task_id)
 
-    if not os.path.isfile(task_path):
+    # Canonicalize and make sure the target really lives under dev-state
+    # (guards against symlinked iteration/task directories pointing elsewhere).
+    dev_state = os.path.realpath(os.path.join(args.project_dir, ".claude", "dev-state"))
+    try:
+        escapes = os.path.commonpath([dev_state, os.path.realpath(task_path)]) != dev_state
+    except ValueError:  # Windows: symlink resolved onto another drive
+        escapes = True
+    if escapes:
+        print(f"Error: task path escapes dev-state: {task_path}", file=sys.stderr)
+        sys.exit(1)
+
+    # Single handle for read-modify-write: no separate existence check and no
+    # reopen between reading and writing.
+    try:
+        fh = open(task_path, "r+", encoding="utf-8")
+    except (FileNotFoundError, IsADirectoryError):
         print(f"Error: task file not found: {task_path}", file=sys.stderr)
         sys.exit(2)
 
-    with open(task_path, "r", encoding="utf-8") as fh:
-        task_data = yaml.safe_load(fh) or {}
-
-    task_data = update_field(task_data, args.field, args.value)
-
-    with open(task_path, "w", encoding="utf-8") as fh:
-        yaml.dump(task_data, fh, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    with fh:
+        task_data = yaml.load(fh, Loader=_Loader) or {}
+        task_data = update_field(task_data, args.field, args.value)
+        # Serialize fully before truncating so a dump error cannot leave a partial file.
+        text = yaml.dump(
+            task_data, Dumper=_Dumper,
+            default_flow_style=False, allow_unicode=True, sort_keys=False,
+        )
+        fh.seek(0)
+        fh.write(text)
+        fh.truncate()
 
     print(f"OK: {args.field} updated in {task_path}")
 
@@ -28,60 +28,96 @@ upgrade-project.py — 将已有项目升级到 dev-framework v4.0
 from __future__ import annotations
 
 import argparse
+import functools
 import importlib.util
-import json
 import os
 import re
 import shutil
 import stat
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable
 
 # ── 框架内部导入 ──────────────────────────────────────────
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from fw_utils import (
+    atomic_open,
+    atomic_write_bytes,
+    atomic_write_text,
     detect_toolchain,
-    load_run_config,
+    dump_session_state,
+    dump_yaml,
+    get_yaml,
     load_session_state,
     load_baseline,
     load_task_yaml,
     save_task_yaml,
     get_framework_dir,
+    json_dumps,
+    json_loads,
+    load_yaml_cached,
+    load_yaml_text,
+    scan_files,
+    utc_isoformat,
 )
 
-# init-project.py 含连字符，无法直接 import，使用 importlib
-_init_spec = importlib.util.spec_from_file_location(
-    "init_project", Path(__file__).resolve().parent / "init-project.py"
-)
-if _init_spec is None or _init_spec.loader is None:
-    print("[ERROR] init-project.py 未找到，upgrade-project.py 无法工作")
-    sys.exit(1)
-_init_module = importlib.util.module_from_spec(_init_spec)
-_init_spec.loader.exec_module(_init_module)
-_setup_git_hooks = _init_module._setup_git_hooks
-append_gitignore = _init_module.append_gitignore
-
-try:
-    import yaml
-except ImportError:
-    yaml = None  # type: ignore
-
 TARGET_VERSION = "4.0"
+# .framework-version 文件内容（预先编码，版本标记步骤直接按字节比较/写入）
+_VERSION_MARKER = (TARGET_VERSION + "\n").encode("ascii")
+
+# v3.0 合并版 CLAUDE.md 的特征标记（按字节匹配，无需解码整个文件）
+_V3_MANUAL_MARKER = "Dev-Framework 运行时手册 v3.0".encode("utf-8")
+
+# 迁移步骤用到的正则（模块级预编译，逐文件循环中不再重复查缓存/编译）
+_RE_PRIORITY = re.compile(rb"^priority\s*:", re.MULTILINE)
+_RE_TASK_ITERATION = re.compile(rb"""^(iteration[ \t]*:[ \t]*["']?)iteration-""", re.MULTILINE)
+_RE_TYPE_LINE = re.compile(rb"type[ \t]*:[^\r\n]")
+_RE_H2 = re.compile(r"^## .*$", re.MULTILINE)
+_RE_NUMBERED_H2 = re.compile(r"## \d+\.")
+_RE_NEXT_SECTION = re.compile(r"\n---\s*\n+## |\n## ")
+# 模板占位符 {{NAME}}（_render_template 一次扫描完成全部替换）
+_RE_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+# 任务 YAML 中下一个顶层块的起始行（非缩进、非注释、非无缩进序列项 "- "）
+_RE_TOP_LEVEL_LINE = re.compile(r"^(?=[^\s#-])", re.MULTILINE)
+# Step 16：旧 CLAUDE.md 中自定义坑点章节的提取（依次尝试 5.1 / 十一）
+_RE_GOTCHAS = (
+    re.compile(r"## 5\.1\s+已知坑点与最佳实践\s*\n(.*?)(?=\n---|\n## [0-9]|\n## [一-龥]|\Z)", re.DOTALL),
+    re.compile(r"## 十一、已知坑点与最佳实践\s*\n(.*?)(?=\n---|\n## |\Z)", re.DOTALL),
+)
+# Step 16：合并时清理旧框架章节（8 / 5.1 / 5.2）并把第 5 章缩短为引用。
+# 只匹配章节起点与终点（"---" 分隔的 6/7 章），中间内容由 _cut_sections 按位置切除
+_RE_STRIP_S8 = re.compile(r"\n---\s*\n+## 8\.\s*上下文校准协议")
+_RE_STRIP_S51 = re.compile(r"\n---\s*\n+## 5\.1\s+已知坑点")
+_RE_STRIP_S52 = re.compile(r"\n---\s*\n+## 5\.2\s+Git 提交规范")
+_RE_SECTION_5_FW = re.compile(r"## 5\.\s*开发框架")
+_RE_SECTION_67_SEP = re.compile(r"\n---\s*\n+## [67]\.")
+# experience-log.md 中无实质内容的行：空白行、"---" 分隔线、"# " 标题（允许前后空白）
+_RE_EXP_DROP_LINE = re.compile(r"^[^\S\n]*(?:# .*\S.*|---)?[^\S\n]*(?:\n|\Z)", re.MULTILINE)
 
 
 # ============================================================
 # 数据类
 # ============================================================
 
-@dataclass
+@dataclass(frozen=True)
 class MigrateResult:
     status: str       # 'applied' | 'skipped' | 'error'
     message: str
     changes: int = 0
 
 
+# 固定文案的跳过结果（不可变，各步骤直接复用同一实例）
+_SKIP_NO_TASK_FILES = MigrateResult("skipped", "未找到任务文件")
+_SKIP_NO_RUN_CONFIG = MigrateResult("skipped", "run-config.yaml 不存在")
+_SKIP_NO_SESSION_STATE = MigrateResult("skipped", "session-state.json 不存在")
+_SKIP_NO_GITIGNORE = MigrateResult("skipped", ".gitignore 不存在")
+_SKIP_NO_V3_MARK = MigrateResult("skipped", ".gitignore 中无 v3.0 注释标记")
+_SKIP_SS_UNCHANGED = MigrateResult("skipped", "session-state.json 结构不变")
+
+
 @dataclass
 class UpgradeContext:
     project_dir: Path
@@ -93,6 +129,30 @@ class UpgradeContext:
     current_version: str = ""
     backup_dir: Path | None = None
     results: list[tuple[str, MigrateResult]] = field(default_factory=list)
+    # 目录遍历结果缓存（多个步骤共用；重命名迭代目录后置为 None 失效）
+    iter_dirs_cache: list[Path] | None = None
+    # dev-state 顶层文件名快照（与 iter_dirs_cache 同一次 scandir 得到；仅在首个写入步骤前可靠）
+    dev_state_files: frozenset[str] | None = None
+    task_files_cache: list[Path] | None = None
+    # 框架根目录只解析一次
+    framework_dir: Path = field(default_factory=get_framework_dir)
+    # 多个步骤共用的固定路径，构造时拼接一次
+    session_state_path: Path = field(init=False)
+    run_config_path: Path = field(init=False)
+    version_path: Path = field(init=False)
+    snapshot_path: Path = field(init=False)
+    gitignore_path: Path = field(init=False)
+    claude_md_path: Path = field(init=False)       # .claude/CLAUDE.md
+    root_claude_md_path: Path = field(init=False)  # 项目根 CLAUDE.md（旧布局）
+
+    def __post_init__(self) -> None:
+        self.session_state_path = self.dev_state / "session-state.json"
+        self.run_config_path = self.dev_state / "run-config.yaml"
+        self.version_path = self.dev_state / ".framework-version"
+        self.snapshot_path = self.dev_state / "context-snapshot.md"
+        self.gitignore_path = self.project_dir / ".gitignore"
+        self.claude_md_path = self.project_dir / ".claude" / "CLAUDE.md"
+        self.root_claude_md_path = self.project_dir / "CLAUDE.md"
 
 
 # ============================================================
@@ -100,29 +160,229 @@ class UpgradeContext:
 # ============================================================
 
 def _log(ctx: UpgradeContext, msg: str) -> None:
-    """verbose 模式下的详细日志。"""
+    """verbose 模式下的详细日志。
+
+    逐文件循环中的调用点先判断 ctx.verbose 再拼接消息，非 verbose 时不做字符串格式化。
+    """
     if ctx.verbose:
         print(f"  [VERBOSE] {msg}")
 
 
-def _find_iter_dirs(dev_state: Path) -> list[Path]:
-    """查找所有迭代目录（iter-* 和 iteration-*）。"""
-    dirs = []
-    if dev_state.exists():
-        for d in sorted(dev_state.iterdir()):
-            if d.is_dir() and (d.name.startswith("iter-") or d.name.startswith("iteration-")):
-                dirs.append(d)
-    return dirs
+def _scan_dev_state(ctx: UpgradeContext) -> bool:
+    """一次 scandir 同时刷新迭代目录缓存与顶层文件名快照；dev-state 不存在时返回 False。"""
+    iter_names = []
+    files = set()
+    found = True
+    try:
+        with os.scandir(ctx.dev_state) as it:
+            for e in it:
+                if e.is_dir():
+                    if e.name.startswith(("iter-", "iteration-")):
+                        iter_names.append(e.name)
+                elif e.is_file():
+                    files.add(e.name)
+    except (FileNotFoundError, NotADirectoryError):
+        found = False
+    ctx.iter_dirs_cache = [ctx.dev_state / n for n in sorted(iter_names)]
+    ctx.dev_state_files = frozenset(files)
+    return found
+
+
+def _find_iter_dirs(ctx: UpgradeContext) -> list[Path]:
+    """查找所有迭代目录（iter-* 和 iteration-*）。结果缓存在 ctx 上。"""
+    if ctx.iter_dirs_cache is None:
+        _scan_dev_state(ctx)
+    return ctx.iter_dirs_cache
+
+
+def _find_task_files(ctx: UpgradeContext) -> list[Path]:
+    """查找所有迭代目录下的 task YAML 文件。结果缓存在 ctx 上。"""
+    if ctx.task_files_cache is None:
+        ctx.task_files_cache = [
+            Path(entry.path)
+            for iter_dir in _find_iter_dirs(ctx)
+            for entry in scan_files(iter_dir / "tasks", ".yaml")
+        ]
+    return ctx.task_files_cache
+
+
+def _invalidate_dir_cache(ctx: UpgradeContext) -> None:
+    """迭代目录被重命名/新增后调用，下次查找时重新遍历。"""
+    ctx.iter_dirs_cache = None
+    ctx.task_files_cache = None
+
+
+def _read_small_text(path: Path) -> str:
+    """读取小文件内容（bytes 解码，省去 TextIOWrapper 构造）。
+
+    不做换行符转换，仅用于只检查内容、不写回的场景（版本标记、.gitignore 标记检测）。
+    """
+    return path.read_bytes().decode("utf-8")
+
+
+def _decode_text(data: bytes) -> str:
+    """把字节解码为文本，换行处理与 read_text 一致（整文件读取统一走 read_bytes + 本函数，不构造 TextIOWrapper）。"""
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _file_contains(path: Path, needle: bytes, head_size: int = 4096) -> bool:
+    """判断文件是否包含 needle（UTF-8 字节串）。
+
+    先只读开头 head_size 字节（标题类标记通常在文件头部），命中即返回；
+    未命中再读剩余部分，结果与整文件检查一致。
+    """
+    with open(path, "rb") as f:
+        data = f.read(head_size)
+        if needle in data:
+            return True
+        rest = f.read()
+    return bool(rest) and needle in data + rest
+
+
+def _load_run_config(ctx: UpgradeContext) -> dict:
+    """读取 run-config.yaml，缺失或解析失败返回空字典（同 fw_utils.load_run_config）。
+
+    经 load_yaml_cached 按 (mtime, size) 缓存：版本检测、hooks、CLAUDE.md/agents 生成等
+    多个步骤重复读取时只解析一次；Step 7/18 改写文件后缓存自动失效。
+    """
+    try:
+        return load_yaml_cached(ctx.run_config_path) or {}
+    except FileNotFoundError:
+        return {}
+    except get_yaml().YAMLError as e:
+        print(f"[ERROR] run-config.yaml 解析失败: {e}")
+        return {}
+
+
+def _detect_toolchain(ctx: UpgradeContext) -> dict:
+    """按当前 run-config 检测工具链（hooks、CLAUDE.md、agents 等步骤共用）。
+
+    detect_toolchain 按 toolchain 配置段缓存结果，toolchain 未变时不重复探测；
+    Step 7/18 改写 toolchain 后自动重新探测。
+    """
+    return detect_toolchain(ctx.project_dir, _load_run_config(ctx))
+
+
+def _map_io(fn: Callable, items: list) -> list:
+    """对 items 逐个调用 fn 并按顺序返回结果；多于 1 项时用线程池并发（I/O 密集）。"""
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(8, len(items))) as ex:
+        return list(ex.map(fn, items))
+
+
+def _splice_top_level_key(text: str, key: str, value) -> str | None:
+    """把 YAML 文本中顶层 key 的整个块替换为 value 的序列化结果，其余内容原样保留。
+
+    只处理 key 在行首恰好出现一次的情况；块尾的空行/注释行留在块外。
+    无法定位时返回 None，由调用方回退为整文件序列化。
+    """
+    starts = [m.start() for m in re.finditer(rf"^{re.escape(key)}[ \t]*:", text, re.MULTILINE)]
+    if len(starts) != 1:
+        return None
+    start = starts[0]
+    nl = text.find("\n", start)
+    nxt = _RE_TOP_LEVEL_LINE.search(text, nl + 1) if nl != -1 else None
+    end = nxt.start() if nxt else len(text)
+    lines = text[start:end].splitlines(keepends=True)
+    while len(lines) > 1 and (not lines[-1].strip() or lines[-1].startswith("#")):
+        end -= len(lines.pop())
+    return "".join((text[:start], dump_yaml({key: value}), text[end:]))
+
+
+def _save_task_spliced(task_path: Path, task: dict, key: str) -> None:
+    """只重写任务文件中 key 对应的顶层块（保留其余字段的注释与格式）。
+
+    拼接结果重新解析后必须与 task 完全一致才写入，否则回退到 save_task_yaml 整文件序列化。
+    """
+    if key in task:
+        text = _decode_text(task_path.read_bytes())
+        new_text = _splice_top_level_key(text, key, task[key])
+        if new_text is not None:
+            try:
+                ok = load_yaml_text(new_text) == task
+            except get_yaml().YAMLError:
+                ok = False
+            if ok:
+                atomic_write_text(task_path, new_text)
+                return
+    save_task_yaml(task_path, task)
+
+
+def _apply_task_migrations(
+    ctx: UpgradeContext,
+    mutate: Callable[[UpgradeContext, Path, dict], str | None],
+    dry_run_msg: str,
+    log_msg: str,
+    prefilter: Callable[[UpgradeContext, Path, bytes], bool] | None = None,
+    splice_key: str | None = None,
+) -> int:
+    """遍历全部任务文件：加载一次、调用 mutate 原地修改，有变更时才写回。
+
+    mutate 返回 None 表示无需修改；否则返回附加在 dry-run 提示后的说明文字。
+    prefilter 基于原始字节做廉价预筛，返回 False 的文件不再做 YAML 解析（重跑/--force 时
+    大部分文件已迁移，可直接跳过）。返回变更的任务文件数。
+
+    加载与 mutate 按文件顺序串行（prefilter/mutate 会输出日志，保持顺序确定；YAML 解析
+    本身持有 GIL，并发无收益）；有变更的文件最后统一在线程池中并发写回。
+    splice_key 指定 mutate 只改动的顶层字段时，写回只替换该字段的块（见 _save_task_spliced）。
+    """
+    changed: list[tuple[Path, dict]] = []
+    for task_path in _find_task_files(ctx):
+        if prefilter is not None and not prefilter(ctx, task_path, task_path.read_bytes()):
+            continue
+        task = load_task_yaml(task_path)
+        if not task:
+            continue
+        detail = mutate(ctx, task_path, task)
+        if detail is None:
+            continue
+        if ctx.dry_run:
+            print(f"    [dry-run] {dry_run_msg}: {task_path.name}{detail}")
+        changed.append((task_path, task))
 
+    if ctx.dry_run:
+        return len(changed)
 
-def _find_task_files(dev_state: Path) -> list[Path]:
-    """查找所有迭代目录下的 task YAML 文件。"""
-    files = []
-    for iter_dir in _find_iter_dirs(dev_state):
-        tasks_dir = iter_dir / "tasks"
-        if tasks_dir.exists():
-            files.extend(sorted(tasks_dir.glob("*.yaml")))
-    return files
+    if splice_key is None:
+        _map_io(lambda item: save_task_yaml(*item), changed)
+    else:
+        _map_io(lambda item: _save_task_spliced(*item, splice_key), changed)
+    if ctx.verbose:
+        for task_path, _ in changed:
+            _log(ctx, f"{log_msg}: {task_path.name}")
+    return len(changed)
+
+
+def _render_template(template: str, values: dict[str, str]) -> str:
+    """单次扫描替换模板中的 {{NAME}} 占位符；values 中没有的占位符原样保留。"""
+    return _RE_PLACEHOLDER.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+
+
+@functools.lru_cache(maxsize=64)
+def _read_template(path: Path) -> str:
+    """读取框架模板文件（升级过程中不会变化，同一模板只读取、解码一次）。
+
+    Step 16 与 Step 22 共用 CLAUDE-framework.md.tmpl，agents 步骤共用 _shared-rules.md。
+    """
+    return _decode_text(path.read_bytes())
+
+
+@functools.lru_cache(maxsize=None)
+def _init_project_module():
+    """按需加载 init-project.py（含连字符，无法直接 import，使用 importlib）。
+
+    只有 Step 14/15 需要其中的 _setup_git_hooks / append_gitignore，
+    延迟到首次使用时再执行该模块，dry-run、已是目标版本等路径无需承担加载开销。
+    """
+    spec = importlib.util.spec_from_file_location(
+        "init_project", Path(__file__).resolve().parent / "init-project.py"
+    )
+    if spec is None or spec.loader is None:
+        raise FileNotFoundError("init-project.py 未找到，无法执行此步骤")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
 
 # ============================================================
@@ -133,10 +393,11 @@ def migrate_preflight_check(ctx: UpgradeContext) -> MigrateResult:
     """检查 .claude/dev-state/ 存在、PyYAML 可用。"""
     errors = []
 
-    if not ctx.dev_state.exists():
+    # 顺带完成 dev-state 的首次遍历，后续版本检测/备份直接使用缓存
+    if not _scan_dev_state(ctx):
         errors.append(f".claude/dev-state/ 不存在: {ctx.dev_state}")
 
-    if yaml is None:
+    if get_yaml() is None:
         errors.append("PyYAML 未安装。运行: pip install PyYAML>=6.0")
 
     if errors:
@@ -151,52 +412,46 @@ def migrate_preflight_check(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_detect_current_version(ctx: UpgradeContext) -> MigrateResult:
     """读取 .framework-version 或特征检测当前版本。"""
-    version_file = ctx.dev_state / ".framework-version"
+    version_file = ctx.version_path
 
-    if version_file.exists():
-        ver = version_file.read_text(encoding="utf-8").strip()
+    try:
+        ver = _read_small_text(version_file).strip()
+    except FileNotFoundError:
+        ver = None
+    if ver is not None:
         ctx.current_version = ver
         if ver == TARGET_VERSION and not ctx.force:
             return MigrateResult("skipped", f"已是 v{TARGET_VERSION}，无需升级（用 --force 强制）")
         return MigrateResult("applied", f"检测到版本标记: v{ver}")
 
-    # 特征检测：检查是否有 iteration-* 目录（旧版命名）
-    has_old_dirs = False
-    if ctx.dev_state.exists():
-        has_old_dirs = any(
-            d.name.startswith("iteration-")
-            for d in ctx.dev_state.iterdir() if d.is_dir()
-        )
-    # 特征检测：检查 run-config.yaml 是否缺少 toolchain
-    config = load_run_config(ctx.project_dir)
-    has_toolchain = "toolchain" in config
-
-    # v4.0 特征检测：检查 .claude/agents/ 是否存在
-    agents_dir = ctx.project_dir / ".claude" / "agents"
-    if agents_dir.exists() and (agents_dir / "analyst.md").exists():
+    # v4.0 特征检测：检查 .claude/agents/analyst.md 是否存在（文件存在即隐含目录存在）
+    if (ctx.project_dir / ".claude" / "agents" / "analyst.md").exists():
         ctx.current_version = "4.0"
         return MigrateResult("applied", "特征检测: .claude/agents/ 存在，判定为 v4.0")
 
     # v3.0 特征检测：检查 .claude/CLAUDE.md 是否包含合并标记
-    claude_md = ctx.project_dir / ".claude" / "CLAUDE.md"
-    if claude_md.exists():
-        try:
-            claude_content = claude_md.read_text(encoding="utf-8")
-            if "Dev-Framework 运行时手册 v3.0" in claude_content:
-                ctx.current_version = "3.0"
-                return MigrateResult("applied", "特征检测: CLAUDE.md 包含 v3.0 运行时手册")
-        except Exception:
-            pass
-
-    if has_old_dirs:
+    claude_md = ctx.claude_md_path
+    try:
+        if _file_contains(claude_md, _V3_MANUAL_MARKER):
+            ctx.current_version = "3.0"
+            return MigrateResult("applied", "特征检测: CLAUDE.md 包含 v3.0 运行时手册")
+    except Exception:
+        pass
+
+    # 特征检测：检查是否有 iteration-* 目录（旧版命名）；
+    # 复用 _find_iter_dirs 的单次 scandir 结果，后续备份/重命名步骤直接命中缓存
+    if any(d.name.startswith("iteration-") for d in _find_iter_dirs(ctx)):
         ctx.current_version = "pre-2.6"
         return MigrateResult("applied", "特征检测: 发现 iteration-* 目录，判定为 pre-2.6")
-    elif not has_toolchain and config:
+
+    # 特征检测：检查 run-config.yaml 是否缺少 toolchain
+    config = _load_run_config(ctx)
+    if config and "toolchain" not in config:
         ctx.current_version = "pre-2.6"
         return MigrateResult("applied", "特征检测: run-config.yaml 缺少 toolchain，判定为 pre-2.6")
-    else:
-        ctx.current_version = "unknown"
-        return MigrateResult("applied", "未找到版本标记，按全量升级处理")
+
+    ctx.current_version = "unknown"
+    return MigrateResult("applied", "未找到版本标记，按全量升级处理")
 
 
 # ============================================================
@@ -211,7 +466,7 @@ def migrate_create_backup(ctx: UpgradeContext) -> MigrateResult:
     if ctx.dry_run:
         return MigrateResult("skipped", "[dry-run] 跳过备份")
 
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
     backup_dir = ctx.dev_state / f".upgrade-backup-{timestamp}"
     backup_dir.mkdir(parents=True, exist_ok=True)
     ctx.backup_dir = backup_dir
@@ -219,67 +474,56 @@ def migrate_create_backup(ctx: UpgradeContext) -> MigrateResult:
     # 收集需要备份的文件
     files_to_backup = []
 
-    # session-state.json
-    ss = ctx.dev_state / "session-state.json"
-    if ss.exists():
-        files_to_backup.append(ss)
-
-    # baseline.json
-    bl = ctx.dev_state / "baseline.json"
-    if bl.exists():
-        files_to_backup.append(bl)
-
-    # run-config.yaml
-    rc = ctx.dev_state / "run-config.yaml"
-    if rc.exists():
-        files_to_backup.append(rc)
-
-    # experience-log.md
-    el = ctx.dev_state / "experience-log.md"
-    if el.exists():
-        files_to_backup.append(el)
+    # dev-state 顶层文件：查预检时的 scandir 快照（备份先于所有写入步骤，快照仍准确）
+    if ctx.dev_state_files is None:
+        _scan_dev_state(ctx)
+    present = ctx.dev_state_files
+    for name in ("session-state.json", "baseline.json", "run-config.yaml", "experience-log.md"):
+        if name in present:
+            files_to_backup.append(ctx.dev_state / name)
 
     # 所有任务 YAML
-    files_to_backup.extend(_find_task_files(ctx.dev_state))
+    files_to_backup.extend(_find_task_files(ctx))
 
     # manifest.json
-    for iter_dir in _find_iter_dirs(ctx.dev_state):
+    for iter_dir in _find_iter_dirs(ctx):
         mf = iter_dir / "manifest.json"
         if mf.exists():
             files_to_backup.append(mf)
 
     # CLAUDE.md（两个位置）
     for claude_md in [
-        ctx.project_dir / ".claude" / "CLAUDE.md",
-        ctx.project_dir / "CLAUDE.md",
+        ctx.claude_md_path,
+        ctx.root_claude_md_path,
     ]:
         if claude_md.exists():
             files_to_backup.append(claude_md)
 
     # Agent 文件
-    agents_dir = ctx.project_dir / ".claude" / "agents"
-    if agents_dir.exists():
-        files_to_backup.extend(agents_dir.glob("*.md"))
+    files_to_backup.extend(
+        Path(entry.path) for entry in scan_files(ctx.project_dir / ".claude" / "agents", ".md")
+    )
 
     # .gitignore
-    gi = ctx.project_dir / ".gitignore"
+    gi = ctx.gitignore_path
     if gi.exists():
         files_to_backup.append(gi)
 
     # context-snapshot.md
-    cs = ctx.dev_state / "context-snapshot.md"
-    if cs.exists():
-        files_to_backup.append(cs)
-
-    # 执行备份
-    manifest_lines = []
-    for src in files_to_backup:
-        rel = src.relative_to(ctx.project_dir)
-        dst = backup_dir / rel
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dst)
-        manifest_lines.append(str(rel))
-        _log(ctx, f"备份: {rel}")
+    if "context-snapshot.md" in present:
+        files_to_backup.append(ctx.snapshot_path)
+
+    # 执行备份：先按去重后的父目录建好目录树，再用线程池并发复制（纯 I/O，可重叠系统调用等待）
+    rels = [src.relative_to(ctx.project_dir) for src in files_to_backup]
+    dsts = [backup_dir / rel for rel in rels]
+    for parent in sorted({dst.parent for dst in dsts}):
+        parent.mkdir(parents=True, exist_ok=True)
+    _map_io(lambda pair: shutil.copy2(*pair), list(zip(files_to_backup, dsts)))
+
+    manifest_lines = [str(rel) for rel in rels]
+    if ctx.verbose:
+        for rel in rels:
+            _log(ctx, f"备份: {rel}")
 
     # 写入 manifest.txt
     (backup_dir / "manifest.txt").write_text(
@@ -298,22 +542,21 @@ def migrate_create_backup(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_rename_iteration_dirs(ctx: UpgradeContext) -> MigrateResult:
     """将 iteration-* 目录重命名为 iter-*，并更新相关引用。"""
-    old_dirs = [
-        d for d in ctx.dev_state.iterdir()
-        if d.is_dir() and d.name.startswith("iteration-")
-    ] if ctx.dev_state.exists() else []
+    # 复用已排序并缓存的迭代目录列表，无需再次遍历/排序
+    old_dirs = [d for d in _find_iter_dirs(ctx) if d.name.startswith("iteration-")]
 
     if not old_dirs:
         return MigrateResult("skipped", "未发现 iteration-* 目录")
 
     changes = 0
-    for old_dir in sorted(old_dirs):
+    for old_dir in old_dirs:
         suffix = old_dir.name.replace("iteration-", "")
         new_name = f"iter-{suffix}"
         new_dir = ctx.dev_state / new_name
 
         if new_dir.exists():
-            _log(ctx, f"目标已存在，跳过: {new_name}")
+            if ctx.verbose:
+                _log(ctx, f"目标已存在，跳过: {new_name}")
             continue
 
         if ctx.dry_run:
@@ -322,45 +565,54 @@ def migrate_rename_iteration_dirs(ctx: UpgradeContext) -> MigrateResult:
             continue
 
         old_dir.rename(new_dir)
-        _log(ctx, f"重命名: {old_dir.name} -> {new_name}")
+        _invalidate_dir_cache(ctx)
+        if ctx.verbose:
+            _log(ctx, f"重命名: {old_dir.name} -> {new_name}")
         changes += 1
 
         # 更新 manifest.json 中的 id
         manifest_path = new_dir / "manifest.json"
         if manifest_path.exists():
-            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            manifest = json_loads(manifest_path.read_bytes())
             if manifest.get("id", "").startswith("iteration-"):
                 manifest["id"] = new_name
-                manifest_path.write_text(
-                    json.dumps(manifest, indent=2, ensure_ascii=False),
-                    encoding="utf-8",
-                )
-                _log(ctx, f"更新 manifest.json id: {new_name}")
+                atomic_write_text(manifest_path, json_dumps(manifest, pretty=True))
+                if ctx.verbose:
+                    _log(ctx, f"更新 manifest.json id: {new_name}")
 
     # 更新 session-state.json 的 current_iteration
     if not ctx.dry_run:
-        ss_path = ctx.dev_state / "session-state.json"
+        ss_path = ctx.session_state_path
         if ss_path.exists():
-            ss = json.loads(ss_path.read_text(encoding="utf-8"))
+            ss = json_loads(ss_path.read_bytes())
             cur = ss.get("current_iteration", "")
             if cur.startswith("iteration-"):
                 ss["current_iteration"] = cur.replace("iteration-", "iter-")
-                ss_path.write_text(
-                    json.dumps(ss, indent=2, ensure_ascii=False),
-                    encoding="utf-8",
-                )
+                atomic_write_text(ss_path, dump_session_state(ss))
                 _log(ctx, f"更新 session-state.json current_iteration")
                 changes += 1
 
-    # 更新所有 task YAML 的 iteration 字段
+    # 更新所有 task YAML 的 iteration 字段：只改这一行的值前缀（字符串替换），
+    # 无需整文件 YAML 解析+重新序列化，同时保留注释与原有格式
     if not ctx.dry_run:
-        for task_path in _find_task_files(ctx.dev_state):
-            task = load_task_yaml(task_path)
-            if task and isinstance(task.get("iteration"), str) and task["iteration"].startswith("iteration-"):
-                task["iteration"] = task["iteration"].replace("iteration-", "iter-")
+        for task_path in _find_task_files(ctx):
+            data = task_path.read_bytes()
+            if b"iteration-" not in data:
+                continue
+            new_data, n = _RE_TASK_ITERATION.subn(rb"\1iter-", data, count=1)
+            if n:
+                atomic_write_bytes(task_path, new_data)
+            else:
+                # 非单行写法（如值换行书写）：回退到 YAML 解析+序列化
+                task = load_task_yaml(task_path)
+                it = task.get("iteration") if task else None
+                if not (isinstance(it, str) and it.startswith("iteration-")):
+                    continue
+                task["iteration"] = it.replace("iteration-", "iter-")
                 save_task_yaml(task_path, task)
+            if ctx.verbose:
                 _log(ctx, f"更新任务 iteration 字段: {task_path.name}")
-                changes += 1
+            changes += 1
 
     return MigrateResult("applied", f"重命名 {len(old_dirs)} 个目录", changes)
 
@@ -371,11 +623,13 @@ def migrate_rename_iteration_dirs(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_session_state_fields(ctx: UpgradeContext) -> MigrateResult:
     """补齐 session-state.json 的 progress 新字段。"""
-    ss_path = ctx.dev_state / "session-state.json"
-    if not ss_path.exists():
-        return MigrateResult("skipped", "session-state.json 不存在")
+    ss_path = ctx.session_state_path
+    try:
+        data = ss_path.read_bytes()
+    except FileNotFoundError:
+        return _SKIP_NO_SESSION_STATE
 
-    ss = json.loads(ss_path.read_text(encoding="utf-8"))
+    ss = json_loads(data)
     progress = ss.setdefault("progress", {})
 
     new_fields = {
@@ -397,9 +651,7 @@ def migrate_session_state_fields(ctx: UpgradeContext) -> MigrateResult:
     if ctx.dry_run:
         return MigrateResult("skipped", f"[dry-run] 将补齐: {', '.join(added)}")
 
-    ss_path.write_text(
-        json.dumps(ss, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
+    atomic_write_text(ss_path, dump_session_state(ss))
     return MigrateResult("applied", f"补齐 progress 字段: {', '.join(added)}", len(added))
 
 
@@ -410,10 +662,12 @@ def migrate_session_state_fields(ctx: UpgradeContext) -> MigrateResult:
 def migrate_baseline_fields(ctx: UpgradeContext) -> MigrateResult:
     """补齐 baseline.json 的 test_results.l2_skipped 字段。"""
     bl_path = ctx.dev_state / "baseline.json"
-    if not bl_path.exists():
+    try:
+        data = bl_path.read_bytes()
+    except FileNotFoundError:
         return MigrateResult("skipped", "baseline.json 不存在")
 
-    bl = json.loads(bl_path.read_text(encoding="utf-8"))
+    bl = json_loads(data)
     test_results = bl.setdefault("test_results", {})
 
     if "l2_skipped" in test_results:
@@ -423,9 +677,7 @@ def migrate_baseline_fields(ctx: UpgradeContext) -> MigrateResult:
         return MigrateResult("skipped", "[dry-run] 将补齐 l2_skipped: 0")
 
     test_results.setdefault("l2_skipped", 0)
-    bl_path.write_text(
-        json.dumps(bl, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
+    atomic_write_text(bl_path, json_dumps(bl, pretty=True))
     return MigrateResult("applied", "补齐 test_results.l2_skipped: 0", 1)
 
 
@@ -435,11 +687,11 @@ def migrate_baseline_fields(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_run_config(ctx: UpgradeContext) -> MigrateResult:
     """补齐 run-config.yaml 的 toolchain/iteration_mode/hooks 配置块。"""
-    rc_path = ctx.dev_state / "run-config.yaml"
+    rc_path = ctx.run_config_path
     if not rc_path.exists():
-        return MigrateResult("skipped", "run-config.yaml 不存在")
+        return _SKIP_NO_RUN_CONFIG
 
-    config = yaml.safe_load(rc_path.read_text(encoding="utf-8")) or {}
+    config = load_yaml_cached(rc_path) or {}
 
     added = []
 
@@ -482,10 +734,7 @@ def migrate_run_config(ctx: UpgradeContext) -> MigrateResult:
     if ctx.dry_run:
         return MigrateResult("skipped", f"[dry-run] 将补齐: {', '.join(added)}")
 
-    rc_path.write_text(
-        yaml.dump(config, allow_unicode=True, default_flow_style=False, sort_keys=False),
-        encoding="utf-8",
-    )
+    atomic_write_text(rc_path, dump_yaml(config))
     return MigrateResult("applied", f"补齐配置块: {', '.join(added)}", len(added))
 
 
@@ -493,90 +742,108 @@ def migrate_run_config(ctx: UpgradeContext) -> MigrateResult:
 # Step 8: BC-5 acceptance_criteria list->dict
 # ============================================================
 
-def migrate_acceptance_criteria(ctx: UpgradeContext) -> MigrateResult:
-    """将 acceptance_criteria 转为 v3.0 schema 格式（functional 分组 + 任务 ID 前缀）。
+_AC_NEW_FORMAT_KEYS = frozenset({
+    "functional", "robustness", "performance", "ux_states", "ux_interaction", "security", "observability",
+})
 
-    支持三种输入格式：
-    1. 旧 list 格式: ["条件1", "条件2"]
-       → {functional: [{id: "XX-AC1", desc: "条件1", status: "FAIL"}, ...]}
-    2. 旧 dict 格式: {"AC-1": {text: "...", met: true/false}}
-       → {functional: [{id: "XX-AC1", desc: "...", status: "PASS"/"FAIL"}, ...]}
-    3. 已是新格式（含 functional key）→ 跳过
-    """
-    task_files = _find_task_files(ctx.dev_state)
-    if not task_files:
-        return MigrateResult("skipped", "未找到任务文件")
+# 顶层 acceptance_criteria 的第一个子键就是新版维度 key → 已是新格式（充分条件）
+_RE_AC_NEW_FORMAT = re.compile(
+    rb"^acceptance_criteria[ \t]*:[ \t]*\r?\n[ \t]+(?:"
+    + b"|".join(sorted(k.encode() for k in _AC_NEW_FORMAT_KEYS))
+    + rb")[ \t]*:",
+    re.MULTILINE,
+)
 
-    changes = 0
-    for task_path in task_files:
-        task = load_task_yaml(task_path)
-        if not task:
-            continue
-        ac = task.get("acceptance_criteria")
-        if ac is None:
-            continue
 
-        # 已是新格式（含任一新版维度 key）→ 跳过
-        _NEW_FORMAT_KEYS = {"functional", "robustness", "performance", "ux_states", "ux_interaction", "security", "observability"}
-        if isinstance(ac, dict) and any(k in ac for k in _NEW_FORMAT_KEYS):
+def _ac_needs_parse(ctx: UpgradeContext, task_path: Path, data: bytes) -> bool:
+    """字节级预筛：无 acceptance_criteria 或可直接判定为新格式时无需解析 YAML。"""
+    if b"acceptance_criteria" not in data:
+        return False
+    if _RE_AC_NEW_FORMAT.search(data):
+        if ctx.verbose:
             _log(ctx, f"已是新格式，跳过: {task_path.name}")
-            continue
+        return False
+    return True
 
-        # 从任务 id 字段提取前缀（如 "CR-001" → "CR-001"）
-        task_id = task.get("id", "TASK")
 
-        functional_items = []
+def _mutate_acceptance_criteria(ctx: UpgradeContext, task_path: Path, task: dict) -> str | None:
+    """把单个任务的 acceptance_criteria 转为 functional 分组格式；无需转换返回 None。"""
+    ac = task.get("acceptance_criteria")
+    if ac is None:
+        return None
 
-        if isinstance(ac, list):
-            if not ac:  # 空列表，跳过转换
+    # 已是新格式（含任一新版维度 key）→ 跳过
+    if isinstance(ac, dict) and not _AC_NEW_FORMAT_KEYS.isdisjoint(ac):
+        if ctx.verbose:
+            _log(ctx, f"已是新格式，跳过: {task_path.name}")
+        return None
+
+    # 从任务 id 字段提取前缀（如 "CR-001" → "CR-001"）
+    task_id = task.get("id", "TASK")
+
+    functional_items = []
+
+    if isinstance(ac, list):
+        if not ac:  # 空列表，跳过转换
+            if ctx.verbose:
                 _log(ctx, f"acceptance_criteria 为空列表，跳过: {task_path.name}")
-                continue
-            # 格式 1: 旧 list 格式
-            for i, item in enumerate(ac, 1):
-                ac_id = f"{task_id}-AC{i}"
-                if isinstance(item, str):
-                    desc = item
-                elif isinstance(item, dict):
-                    desc = item.get("text", item.get("desc", str(item)))
-                else:
-                    desc = str(item)
-                functional_items.append({
-                    "id": ac_id,
-                    "desc": desc,
-                    "status": "FAIL",
-                })
-        elif isinstance(ac, dict):
-            # 格式 2: 旧 dict 格式 {"AC-1": {text: "...", met: true/false}}
-            for i, (key, val) in enumerate(ac.items(), 1):
-                ac_id = f"{task_id}-AC{i}"
-                if isinstance(val, dict):
-                    desc = val.get("text", val.get("desc", str(val)))
-                    met = val.get("met", False)
-                    status = "PASS" if met else "FAIL"
-                else:
-                    desc = str(val)
-                    status = "FAIL"
-                functional_items.append({
-                    "id": ac_id,
-                    "desc": desc,
-                    "status": status,
-                })
-        else:
+            return None
+        # 格式 1: 旧 list 格式
+        for i, item in enumerate(ac, 1):
+            ac_id = f"{task_id}-AC{i}"
+            if isinstance(item, str):
+                desc = item
+            elif isinstance(item, dict):
+                desc = item.get("text", item.get("desc", str(item)))
+            else:
+                desc = str(item)
+            functional_items.append({
+                "id": ac_id,
+                "desc": desc,
+                "status": "FAIL",
+            })
+    elif isinstance(ac, dict):
+        # 格式 2: 旧 dict 格式 {"AC-1": {text: "...", met: true/false}}
+        for i, (key, val) in enumerate(ac.items(), 1):
+            ac_id = f"{task_id}-AC{i}"
+            if isinstance(val, dict):
+                desc = val.get("text", val.get("desc", str(val)))
+                met = val.get("met", False)
+                status = "PASS" if met else "FAIL"
+            else:
+                desc = str(val)
+                status = "FAIL"
+            functional_items.append({
+                "id": ac_id,
+                "desc": desc,
+                "status": status,
+            })
+    else:
+        if ctx.verbose:
             _log(ctx, f"未知 acceptance_criteria 类型，跳过: {task_path.name}")
-            continue
+        return None
 
-        new_ac = {"functional": functional_items}
+    task["acceptance_criteria"] = {"functional": functional_items}
+    return f" ({len(functional_items)} 项)"
 
-        if ctx.dry_run:
-            print(f"    [dry-run] 转换: {task_path.name} ({len(functional_items)} 项)")
-            changes += 1
-            continue
 
-        task["acceptance_criteria"] = new_ac
-        save_task_yaml(task_path, task)
-        _log(ctx, f"转换 acceptance_criteria: {task_path.name}")
-        changes += 1
+def migrate_acceptance_criteria(ctx: UpgradeContext) -> MigrateResult:
+    """将 acceptance_criteria 转为 v3.0 schema 格式（functional 分组 + 任务 ID 前缀）。
 
+    支持三种输入格式：
+    1. 旧 list 格式: ["条件1", "条件2"]
+       → {functional: [{id: "XX-AC1", desc: "条件1", status: "FAIL"}, ...]}
+    2. 旧 dict 格式: {"AC-1": {text: "...", met: true/false}}
+       → {functional: [{id: "XX-AC1", desc: "...", status: "PASS"/"FAIL"}, ...]}
+    3. 已是新格式（含 functional key）→ 跳过
+    """
+    if not _find_task_files(ctx):
+        return _SKIP_NO_TASK_FILES
+
+    changes = _apply_task_migrations(
+        ctx, _mutate_acceptance_criteria, "转换", "转换 acceptance_criteria",
+        prefilter=_ac_needs_parse, splice_key="acceptance_criteria",
+    )
     if changes == 0:
         return MigrateResult("skipped", "所有任务的 acceptance_criteria 已是新格式")
     return MigrateResult("applied", f"转换 {changes} 个任务文件", changes)
@@ -588,36 +855,58 @@ def migrate_acceptance_criteria(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_add_priority(ctx: UpgradeContext) -> MigrateResult:
     """在 task YAML 的 type: 行后插入 priority: "P1"（字符串插入，保留注释）。"""
-    task_files = _find_task_files(ctx.dev_state)
+    task_files = _find_task_files(ctx)
     if not task_files:
-        return MigrateResult("skipped", "未找到任务文件")
+        return _SKIP_NO_TASK_FILES
 
-    changes = 0
+    pending: list[tuple[Path, bytes]] = []
     for task_path in task_files:
-        content = task_path.read_text(encoding="utf-8")
+        # 逐行单遍扫描字节：同时识别顶层 priority: 与第一个 type: 行，不解码、不整段拼接
+        lines = task_path.read_bytes().splitlines(keepends=True)
+        has_priority = False
+        type_idx = -1
+        for i, line in enumerate(lines):
+            if line.startswith(b"priority") and _RE_PRIORITY.match(line):
+                has_priority = True
+                break
+            if type_idx < 0 and line.startswith(b"type") and _RE_TYPE_LINE.match(line):
+                type_idx = i
 
         # 如果已有 priority 字段，跳过
-        if re.search(r"^priority\s*:", content, re.MULTILINE):
-            _log(ctx, f"已有 priority，跳过: {task_path.name}")
+        if has_priority:
+            if ctx.verbose:
+                _log(ctx, f"已有 priority，跳过: {task_path.name}")
             continue
 
         # 在 type: 行后插入 priority: "P1"
-        match = re.search(r"^(type\s*:.+)$", content, re.MULTILINE)
-        if not match:
-            _log(ctx, f"未找到 type: 行，跳过: {task_path.name}")
+        if type_idx < 0:
+            if ctx.verbose:
+                _log(ctx, f"未找到 type: 行，跳过: {task_path.name}")
             continue
 
         if ctx.dry_run:
             print(f"    [dry-run] 添加 priority: {task_path.name}")
-            changes += 1
+            pending.append((task_path, b""))
             continue
 
-        insert_pos = match.end()
-        new_content = content[:insert_pos] + '\npriority: "P1"' + content[insert_pos:]
-        task_path.write_text(new_content, encoding="utf-8")
-        _log(ctx, f"添加 priority: {task_path.name}")
-        changes += 1
+        # 沿用 type: 行自身的换行符；type: 为末行且无换行时与原先一样只在其后补一行
+        type_line = lines[type_idx]
+        body = type_line.rstrip(b"\r\n")
+        eol = type_line[len(body):]
+        if eol:
+            lines.insert(type_idx + 1, b'priority: "P1"' + eol)
+        else:
+            lines[type_idx] = body + b'\npriority: "P1"'
+        pending.append((task_path, b"".join(lines)))
+
+    # 扫描按文件顺序串行（日志顺序确定），写回与 _apply_task_migrations 一样交给线程池并发
+    if not ctx.dry_run:
+        _map_io(lambda item: atomic_write_bytes(*item), pending)
+        if ctx.verbose:
+            for task_path, _ in pending:
+                _log(ctx, f"添加 priority: {task_path.name}")
 
+    changes = len(pending)
     if changes == 0:
         return MigrateResult("skipped", "所有任务已有 priority 字段")
     return MigrateResult("applied", f"为 {changes} 个任务添加 priority", changes)
@@ -627,46 +916,40 @@ def migrate_add_priority(ctx: UpgradeContext) -> MigrateResult:
 # Step 10: BC-9 review_issues 格式规范化
 # ============================================================
 
-def migrate_review_issues(ctx: UpgradeContext) -> MigrateResult:
-    """将 review_result.issues 中的纯字符串转为 {severity, desc} 格式。"""
-    task_files = _find_task_files(ctx.dev_state)
-    if not task_files:
-        return MigrateResult("skipped", "未找到任务文件")
-
-    changes = 0
-    for task_path in task_files:
-        task = load_task_yaml(task_path)
-        if not task:
-            continue
-        review = task.get("review_result")
-        if not isinstance(review, dict):
-            continue
-        issues = review.get("issues")
-        if not isinstance(issues, list):
-            continue
-
-        converted = False
-        new_issues = []
-        for item in issues:
-            if isinstance(item, str):
-                new_issues.append({"severity": "info", "desc": item})
-                converted = True
-            else:
-                new_issues.append(item)
+def _mutate_review_issues(ctx: UpgradeContext, task_path: Path, task: dict) -> str | None:
+    """把 review_result.issues 中的纯字符串条目规范化为 {severity, desc}；无需修改返回 None。"""
+    review = task.get("review_result")
+    if not isinstance(review, dict):
+        return None
+    issues = review.get("issues")
+    if not isinstance(issues, list):
+        return None
+
+    converted = False
+    new_issues = []
+    for item in issues:
+        if isinstance(item, str):
+            new_issues.append({"severity": "info", "desc": item})
+            converted = True
+        else:
+            new_issues.append(item)
 
-        if not converted:
-            continue
+    if not converted:
+        return None
+    review["issues"] = new_issues
+    return ""
 
-        if ctx.dry_run:
-            print(f"    [dry-run] 规范化 review_issues: {task_path.name}")
-            changes += 1
-            continue
 
-        review["issues"] = new_issues
-        save_task_yaml(task_path, task)
-        _log(ctx, f"规范化 review_issues: {task_path.name}")
-        changes += 1
+def migrate_review_issues(ctx: UpgradeContext) -> MigrateResult:
+    """将 review_result.issues 中的纯字符串转为 {severity, desc} 格式。"""
+    if not _find_task_files(ctx):
+        return _SKIP_NO_TASK_FILES
 
+    changes = _apply_task_migrations(
+        ctx, _mutate_review_issues, "规范化 review_issues", "规范化 review_issues",
+        prefilter=lambda ctx, task_path, data: b"issues" in data,
+        splice_key="review_result",
+    )
     if changes == 0:
         return MigrateResult("skipped", "所有任务的 review_issues 已是规范格式")
     return MigrateResult("applied", f"规范化 {changes} 个任务的 review_issues", changes)
@@ -702,62 +985,67 @@ _SECTION_5_2 = """\
 """
 
 
+def _find_section_5_insert_pos(content: str) -> int:
+    """计算 5.1/5.2 章节在 CLAUDE.md 中的插入位置。
+
+    策略 1：在 "## 5." 章节末尾（"---" 分隔的 "## 6." 或下一个同级编号标题之前）；
+    策略 2：在标题含 "开发框架" 的章节末尾；
+    策略 3：追加到文件末尾。
+    """
+    # 只扫描一遍二级标题，后续查找都在这份 (起始, 结束, 标题行) 列表上进行
+    headings = [(m.start(), m.end(), m.group()) for m in _RE_H2.finditer(content)]
+
+    idx_5 = next((i for i, h in enumerate(headings) if h[2].startswith("## 5.")), -1)
+    if idx_5 >= 0:
+        following = headings[idx_5 + 1:]
+        # 优先 "---" 分隔行 + "## 6."，返回分隔行前的换行位置（原地回退空白，不切片）
+        for start, _, text in following:
+            if text.startswith("## 6."):
+                j = start
+                while j > 0 and content[j - 1].isspace():
+                    j -= 1
+                if j - 4 >= headings[idx_5][1] and content.startswith("\n---", j - 4):
+                    return j - 4
+        for start, _, text in following:
+            if _RE_NUMBERED_H2.match(text):
+                return start - 1
+
+    idx_fw = next((i for i, h in enumerate(headings) if "开发框架" in h[2]), -1)
+    if 0 <= idx_fw < len(headings) - 1:
+        return headings[idx_fw + 1][0] - 1
+
+    return len(content)
+
+
 def migrate_claude_md(ctx: UpgradeContext) -> MigrateResult:
     """合并插入 5.1/5.2 章节到 CLAUDE.md。"""
     # 定位 CLAUDE.md
-    claude_md_path = ctx.project_dir / ".claude" / "CLAUDE.md"
+    claude_md_path = ctx.claude_md_path
     if not claude_md_path.exists():
-        claude_md_path = ctx.project_dir / "CLAUDE.md"
+        claude_md_path = ctx.root_claude_md_path
     if not claude_md_path.exists():
         return MigrateResult("skipped", "未找到 CLAUDE.md")
 
-    content = claude_md_path.read_text(encoding="utf-8")
+    data = claude_md_path.read_bytes()
 
     # 检查是否已包含 5.1
-    if "已知坑点" in content and "5.1" in content:
+    if "已知坑点".encode("utf-8") in data and b"5.1" in data:
         return MigrateResult("skipped", "CLAUDE.md 已包含 5.1 章节")
 
     # v3.0: 如果框架模板存在，由 Step 16 (generate_merged_claude_md) 统一处理
-    fw_tmpl = get_framework_dir() / "templates" / "project" / "CLAUDE-framework.md.tmpl"
+    fw_tmpl = ctx.framework_dir / "templates" / "project" / "CLAUDE-framework.md.tmpl"
     if fw_tmpl.exists():
         return MigrateResult("skipped", "已是 v3.0 格式，由 Step 16 (generate_merged_claude_md) 处理")
 
-    # 查找插入位置：在 "## 5. 开发框架" 章节的末尾（下一个 ## 之前）
-    # 或者在包含 "开发框架" 的章节后
-    insert_pos = None
-
-    # 策略 1：找到 "## 5." 开头的章节，然后找下一个 "## 6." 或 "---\n\n## 6."
-    match_5 = re.search(r"^## 5\..*$", content, re.MULTILINE)
-    if match_5:
-        # 找到下一个 ## 6. 之前的 ---
-        match_next = re.search(r"\n---\s*\n+## 6\.", content[match_5.end():])
-        if match_next:
-            insert_pos = match_5.end() + match_next.start()
-        else:
-            # 找下一个同级标题
-            match_next = re.search(r"\n## \d+\.", content[match_5.end():])
-            if match_next:
-                insert_pos = match_5.end() + match_next.start()
-
-    # 策略 2：找包含 "开发框架" 的章节标题
-    if insert_pos is None:
-        match_fw = re.search(r"^## .*开发框架.*$", content, re.MULTILINE)
-        if match_fw:
-            match_next = re.search(r"\n## ", content[match_fw.end():])
-            if match_next:
-                insert_pos = match_fw.end() + match_next.start()
-            else:
-                insert_pos = len(content)
+    content = _decode_text(data)
 
-    if insert_pos is None:
-        # 策略 3：追加到文件末尾
-        insert_pos = len(content)
+    insert_pos = _find_section_5_insert_pos(content)
 
     if ctx.dry_run:
         return MigrateResult("skipped", f"[dry-run] 将在 CLAUDE.md 第 {content[:insert_pos].count(chr(10))+1} 行后插入 5.1/5.2")
 
-    new_content = content[:insert_pos] + _SECTION_5_1 + _SECTION_5_2 + content[insert_pos:]
-    claude_md_path.write_text(new_content, encoding="utf-8")
+    new_content = "".join((content[:insert_pos], _SECTION_5_1, _SECTION_5_2, content[insert_pos:]))
+    atomic_write_text(claude_md_path, new_content)
     return MigrateResult("applied", f"插入 5.1/5.2 章节到 {claude_md_path.relative_to(ctx.project_dir)}", 2)
 
 
@@ -776,66 +1064,80 @@ _EXPERIENCE_DEPRECATED = """\
 """
 
 
+def _find_section_51_end(content: str) -> int:
+    """返回「## 5.1 ...已知坑点...」标题行（含换行符）之后的位置，未找到返回 -1。
+
+    标题是固定前缀，用 str.find 定位候选行后再检查关键字，不走正则。
+    """
+    pos = content.find("## 5.1")
+    while pos != -1:
+        nl = content.find("\n", pos)
+        if nl == -1:
+            break
+        if "已知坑点" in content[pos + 6:nl]:
+            return nl + 1
+        pos = content.find("## 5.1", nl)
+    return -1
+
+
 def migrate_experience_log(ctx: UpgradeContext) -> MigrateResult:
     """将 experience-log.md 内容迁移到 CLAUDE.md，然后替换为废弃声明。"""
     exp_path = ctx.dev_state / "experience-log.md"
-    if not exp_path.exists():
+    try:
+        data = exp_path.read_bytes()
+    except FileNotFoundError:
         return MigrateResult("skipped", "experience-log.md 不存在")
 
-    content = exp_path.read_text(encoding="utf-8").strip()
-
-    # 检查是否已是废弃声明
-    if "DEPRECATED" in content or "已废弃" in content:
+    # 检查是否已是废弃声明（重跑时的常见情形，按字节判断，无需解码）
+    if b"DEPRECATED" in data or "已废弃".encode("utf-8") in data:
         return MigrateResult("skipped", "experience-log.md 已是废弃状态")
 
-    # 提取实质内容（去掉标题行和空行）
-    lines = content.splitlines()
-    substance = []
-    for line in lines:
-        stripped = line.strip()
-        # 跳过标题和分隔线
-        if stripped.startswith("# ") or stripped == "---" or stripped == "":
-            continue
-        substance.append(line)
+    content = _decode_text(data).strip()
+
+    # 提取实质内容（一次正则替换去掉标题行、分隔线和空行）
+    substance = _RE_EXP_DROP_LINE.sub("", content).rstrip("\n")
 
     if not substance:
         # 无实质内容，直接替换
         if ctx.dry_run:
             return MigrateResult("skipped", "[dry-run] experience-log.md 无实质内容，将替换为废弃声明")
-        exp_path.write_text(_EXPERIENCE_DEPRECATED, encoding="utf-8")
+        atomic_write_text(exp_path, _EXPERIENCE_DEPRECATED)
         return MigrateResult("applied", "experience-log.md 替换为废弃声明（无实质内容需迁移）", 1)
 
     # 有实质内容：追加到 CLAUDE.md 的 5.1 章节
-    claude_md_path = ctx.project_dir / ".claude" / "CLAUDE.md"
+    claude_md_path = ctx.claude_md_path
     if not claude_md_path.exists():
-        claude_md_path = ctx.project_dir / "CLAUDE.md"
+        claude_md_path = ctx.root_claude_md_path
 
+    substance_count = substance.count("\n") + 1
     if ctx.dry_run:
-        return MigrateResult("skipped", f"[dry-run] 将迁移 {len(substance)} 行到 CLAUDE.md")
+        return MigrateResult("skipped", f"[dry-run] 将迁移 {substance_count} 行到 CLAUDE.md")
 
     if claude_md_path.exists():
-        claude_content = claude_md_path.read_text(encoding="utf-8")
+        claude_content = _decode_text(claude_md_path.read_bytes())
         # 在 5.1 章节末尾追加
-        match = re.search(r"(## 5\.1.*已知坑点.*\n)", claude_content)
-        if match:
+        header_end = _find_section_51_end(claude_content)
+        if header_end != -1:
             # 找到 5.1 下一个 ## 或 --- 之前
-            rest = claude_content[match.end():]
-            next_section = re.search(r"\n---\s*\n+## |\n## ", rest)
+            next_section = _RE_NEXT_SECTION.search(claude_content, header_end)
             if next_section:
-                insert_pos = match.end() + next_section.start()
+                insert_pos = next_section.start()
             else:
                 insert_pos = len(claude_content)
 
             migrated_block = (
                 "\n<!-- 以下内容从 experience-log.md 自动迁移 (upgrade v2.6) -->\n"
-                + "\n".join(substance) + "\n"
+                + substance + "\n"
             )
-            claude_content = claude_content[:insert_pos] + migrated_block + claude_content[insert_pos:]
-            claude_md_path.write_text(claude_content, encoding="utf-8")
+            # 分段写入同目录临时文件后原子替换，不再拼接出完整的新字符串
+            with atomic_open(claude_md_path) as f:
+                f.write(claude_content[:insert_pos])
+                f.write(migrated_block)
+                f.write(claude_content[insert_pos:])
 
     # 替换 experience-log.md 为废弃声明
-    exp_path.write_text(_EXPERIENCE_DEPRECATED, encoding="utf-8")
-    return MigrateResult("applied", f"迁移 {len(substance)} 行经验到 CLAUDE.md，原文件已废弃", len(substance) + 1)
+    atomic_write_text(exp_path, _EXPERIENCE_DEPRECATED)
+    return MigrateResult("applied", f"迁移 {substance_count} 行经验到 CLAUDE.md，原文件已废弃", substance_count + 1)
 
 
 # ============================================================
@@ -848,7 +1150,7 @@ def migrate_agent_protocols(ctx: UpgradeContext) -> MigrateResult:
     if not agents_dir.exists():
         return MigrateResult("skipped", "项目中无 .claude/agents/ 目录")
 
-    agent_files = list(agents_dir.glob("*.md"))
+    agent_files = scan_files(agents_dir, ".md")
     if not agent_files:
         return MigrateResult("skipped", ".claude/agents/ 目录为空")
 
@@ -872,9 +1174,8 @@ def migrate_git_hooks(ctx: UpgradeContext) -> MigrateResult:
     if ctx.dry_run:
         return MigrateResult("skipped", "[dry-run] 将重新生成 Git hooks")
 
-    config = load_run_config(ctx.project_dir)
-    toolchain = detect_toolchain(ctx.project_dir, config)
-    _setup_git_hooks(ctx.project_dir, toolchain=toolchain)
+    toolchain = _detect_toolchain(ctx)
+    _init_project_module()._setup_git_hooks(ctx.project_dir, toolchain=toolchain)
     return MigrateResult("applied", "重新生成 pre-commit / commit-msg / pre-push (shell+py 分离)", 6)
 
 
@@ -884,16 +1185,20 @@ def migrate_git_hooks(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_gitignore(ctx: UpgradeContext) -> MigrateResult:
     """调用 init-project.py 的 append_gitignore()。"""
-    gitignore = ctx.project_dir / ".gitignore"
-    marker = "# === dev-framework: 以下由框架自动生成，禁止手动修改 ==="
+    gitignore = ctx.gitignore_path
+    marker = "# === dev-framework: 以下由框架自动生成，禁止手动修改 ===".encode("utf-8")
 
-    if gitignore.exists() and marker in gitignore.read_text(encoding="utf-8"):
+    try:
+        has_marker = marker in gitignore.read_bytes()
+    except FileNotFoundError:
+        has_marker = False
+    if has_marker:
         return MigrateResult("skipped", ".gitignore 已包含框架规则")
 
     if ctx.dry_run:
         return MigrateResult("skipped", "[dry-run] 将追加 .gitignore 框架规则")
 
-    append_gitignore(ctx.project_dir)
+    _init_project_module().append_gitignore(ctx.project_dir)
     return MigrateResult("applied", "追加 .gitignore 框架规则", 1)
 
 
@@ -917,13 +1222,13 @@ def migrate_generate_merged_claude_md(ctx: UpgradeContext) -> MigrateResult:
 
 def _generate_merged_claude_md_fallback(ctx: UpgradeContext) -> MigrateResult:
     """回退逻辑：执行 Step 11 的基本 CLAUDE.md 更新（插入 5.1/5.2 章节）。"""
-    claude_md_path = ctx.project_dir / ".claude" / "CLAUDE.md"
+    claude_md_path = ctx.claude_md_path
     if not claude_md_path.exists():
-        claude_md_path = ctx.project_dir / "CLAUDE.md"
+        claude_md_path = ctx.root_claude_md_path
     if not claude_md_path.exists():
         return MigrateResult("applied", "[fallback] 未找到 CLAUDE.md，跳过基本更新", 0)
 
-    content = claude_md_path.read_text(encoding="utf-8")
+    content = _decode_text(claude_md_path.read_bytes())
 
     # 如果已包含 5.1 章节，无需重复插入
     if "已知坑点" in content and "5.1" in content:
@@ -932,50 +1237,56 @@ def _generate_merged_claude_md_fallback(ctx: UpgradeContext) -> MigrateResult:
     if ctx.dry_run:
         return MigrateResult("skipped", "[fallback][dry-run] 将插入 5.1/5.2 章节")
 
-    # 查找插入位置
-    insert_pos = None
+    insert_pos = _find_section_5_insert_pos(content)
 
-    match_5 = re.search(r"^## 5\..*$", content, re.MULTILINE)
-    if match_5:
-        match_next = re.search(r"\n---\s*\n+## 6\.", content[match_5.end():])
-        if match_next:
-            insert_pos = match_5.end() + match_next.start()
-        else:
-            match_next = re.search(r"\n## \d+\.", content[match_5.end():])
-            if match_next:
-                insert_pos = match_5.end() + match_next.start()
-
-    if insert_pos is None:
-        match_fw = re.search(r"^## .*开发框架.*$", content, re.MULTILINE)
-        if match_fw:
-            match_next = re.search(r"\n## ", content[match_fw.end():])
-            if match_next:
-                insert_pos = match_fw.end() + match_next.start()
-            else:
-                insert_pos = len(content)
+    new_content = "".join((content[:insert_pos], _SECTION_5_1, _SECTION_5_2, content[insert_pos:]))
+    atomic_write_text(claude_md_path, new_content)
+    return MigrateResult("applied", f"[fallback] 插入 5.1/5.2 章节到 {claude_md_path.relative_to(ctx.project_dir)}", 2)
 
-    if insert_pos is None:
-        insert_pos = len(content)
 
-    new_content = content[:insert_pos] + _SECTION_5_1 + _SECTION_5_2 + content[insert_pos:]
-    claude_md_path.write_text(new_content, encoding="utf-8")
-    return MigrateResult("applied", f"[fallback] 插入 5.1/5.2 章节到 {claude_md_path.relative_to(ctx.project_dir)}", 2)
+def _cut_sections(
+    text: str, start_re: re.Pattern, end_re: re.Pattern | None, repl: str = "",
+) -> str:
+    """把 start_re 匹配处到其后第一个 end_re 匹配处（不含）之间的片段替换为 repl。
+
+    end_re 为 None 时切到文件末尾。结果与 re.DOTALL 的 "start.*?(?=end)" / "start.*$"
+    全局替换一致，但起止位置都用 search(pos) 直接定位，不逐字符尝试前瞻。
+    """
+    parts = []
+    pos = 0
+    while True:
+        m = start_re.search(text, pos)
+        if not m:
+            break
+        if end_re is None:
+            end = len(text)
+        else:
+            e = end_re.search(text, m.end())
+            if not e:
+                break
+            end = e.start()
+        parts.append(text[pos:m.start()])
+        parts.append(repl)
+        pos = end
+        if end_re is None:
+            break
+    parts.append(text[pos:])
+    return "".join(parts)
 
 
 def _generate_merged_claude_md_impl(ctx: UpgradeContext) -> MigrateResult:
     """generate_merged_claude_md 的主逻辑实现。"""
-    claude_md_path = ctx.project_dir / ".claude" / "CLAUDE.md"
+    claude_md_path = ctx.claude_md_path
     if not claude_md_path.exists():
-        claude_md_path = ctx.project_dir / "CLAUDE.md"
+        claude_md_path = ctx.root_claude_md_path
 
     # 检查是否已是 v3.0 合并版（--force 时强制重新生成）
     if claude_md_path.exists() and not ctx.force:
-        content = claude_md_path.read_text(encoding="utf-8")
-        if "Dev-Framework 运行时手册 v3.0" in content:
+        if _file_contains(claude_md_path, _V3_MANUAL_MARKER):
             return MigrateResult("skipped", "CLAUDE.md 已包含 v3.0 运行时手册")
 
     # 读取模板
-    framework_dir = get_framework_dir()
+    framework_dir = ctx.framework_dir
     fw_tmpl = framework_dir / "templates" / "project" / "CLAUDE-framework.md.tmpl"
     if not fw_tmpl.exists():
         return MigrateResult("error", f"框架模板不存在: {fw_tmpl}")
@@ -983,13 +1294,10 @@ def _generate_merged_claude_md_impl(ctx: UpgradeContext) -> MigrateResult:
     # 提取现有 CLAUDE.md 中的自定义坑点内容
     gotchas_content = ""
     if claude_md_path.exists():
-        existing = claude_md_path.read_text(encoding="utf-8")
+        existing = _decode_text(claude_md_path.read_bytes())
         # 尝试提取 5.1 或 十一 章节内容
-        for pattern in [
-            r"## 5\.1\s+已知坑点与最佳实践\s*\n(.*?)(?=\n---|\n## [0-9]|\n## [一-龥]|\Z)",
-            r"## 十一、已知坑点与最佳实践\s*\n(.*?)(?=\n---|\n## |\Z)",
-        ]:
-            match = re.search(pattern, existing, re.DOTALL)
+        for pattern in _RE_GOTCHAS:
+            match = pattern.search(existing)
             if match:
                 raw = match.group(1).strip()
                 # 过滤掉纯注释行
@@ -1005,22 +1313,21 @@ def _generate_merged_claude_md_impl(ctx: UpgradeContext) -> MigrateResult:
         return MigrateResult("skipped", msg)
 
     # 生成合并版
-    fw_content = fw_tmpl.read_text(encoding="utf-8")
-    fw_content = fw_content.replace("{{FRAMEWORK_PATH}}", str(framework_dir))
-    fw_content = fw_content.replace("{{PROJECT_GOTCHAS}}", gotchas_content)
-
     # 工具链命令替换：根据项目实际工具链替换 {{TEST_RUNNER}}
-    config = load_run_config(ctx.project_dir)
-    toolchain = detect_toolchain(ctx.project_dir, config)
-    fw_content = fw_content.replace("{{TEST_RUNNER}}", toolchain["test_runner"])
-    fw_content = fw_content.replace("{{PYTHON}}", toolchain["python"])
+    toolchain = _detect_toolchain(ctx)
+    fw_content = _render_template(_read_template(fw_tmpl), {
+        "FRAMEWORK_PATH": str(framework_dir),
+        "PROJECT_GOTCHAS": gotchas_content,
+        "TEST_RUNNER": toolchain["test_runner"],
+        "PYTHON": toolchain["python"],
+    })
 
     # 保留已有的项目配置部分（如果有）
-    target_path = ctx.project_dir / ".claude" / "CLAUDE.md"
+    target_path = ctx.claude_md_path
 
     # 如果已有 CLAUDE.md 包含项目配置（非纯框架内容），保留项目配置 + 追加框架内容
     if target_path.exists():
-        existing = target_path.read_text(encoding="utf-8")
+        existing = _decode_text(target_path.read_bytes())
         # 检查是否有项目特定配置（section 1-4, 6, 7）
         if "## 1. 项目概述" in existing or "## 项目概述" in existing:
             # 移除旧的框架章节（5.x, 8），保留项目配置
@@ -1028,44 +1335,24 @@ def _generate_merged_claude_md_impl(ctx: UpgradeContext) -> MigrateResult:
             # 先移除旧框架引用
             cleaned = existing
             # 移除旧的上下文校准协议（section 8 到文件末尾）
-            # 注意：re.DOTALL 使 .* 匹配换行符，会删除 section 8 之后的所有内容
+            # 注意：会删除 section 8 之后的所有内容
             # 标准 CLAUDE.md 模板最多到 section 7，因此不会误删项目自定义内容
-            cleaned = re.sub(
-                r"\n---\s*\n+## 8\.\s*上下文校准协议.*$",
-                "",
-                cleaned,
-                flags=re.DOTALL,
-            )
+            cleaned = _cut_sections(cleaned, _RE_STRIP_S8, None)
             # 移除旧的 5.1/5.2 （框架相关内容）
-            cleaned = re.sub(
-                r"\n---\s*\n+## 5\.1\s+已知坑点.*?(?=\n---\s*\n+## [67]\.)",
-                "",
-                cleaned,
-                flags=re.DOTALL,
-            )
-            cleaned = re.sub(
-                r"\n---\s*\n+## 5\.2\s+Git 提交规范.*?(?=\n---\s*\n+## [67]\.)",
-                "",
-                cleaned,
-                flags=re.DOTALL,
-            )
+            cleaned = _cut_sections(cleaned, _RE_STRIP_S51, _RE_SECTION_67_SEP)
+            cleaned = _cut_sections(cleaned, _RE_STRIP_S52, _RE_SECTION_67_SEP)
             # 更新 section 5 为简短引用
-            cleaned = re.sub(
-                r"## 5\.\s*开发框架.*?(?=\n---\s*\n+## [67]\.)",
+            cleaned = _cut_sections(
+                cleaned, _RE_SECTION_5_FW, _RE_SECTION_67_SEP,
                 "## 5. 开发框架\n\n本项目使用 dev-framework v3.0 管理。\n完整框架运行时手册已合并到 `.claude/CLAUDE.md`，作为系统提示自动加载。\n",
-                cleaned,
-                flags=re.DOTALL,
-            )
-            target_path.write_text(
-                cleaned.rstrip() + "\n\n---\n\n" + fw_content,
-                encoding="utf-8",
             )
+            atomic_write_text(target_path, cleaned.rstrip() + "\n\n---\n\n" + fw_content)
         else:
             # 纯框架文件，直接替换
-            target_path.write_text(fw_content, encoding="utf-8")
+            atomic_write_text(target_path, fw_content)
     else:
         target_path.parent.mkdir(parents=True, exist_ok=True)
-        target_path.write_text(fw_content, encoding="utf-8")
+        atomic_write_text(target_path, fw_content)
 
     changes = 1
     if gotchas_content:
@@ -1083,7 +1370,7 @@ def _generate_merged_claude_md_impl(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_create_context_snapshot(ctx: UpgradeContext) -> MigrateResult:
     """创建初始 context-snapshot.md。"""
-    snapshot_path = ctx.dev_state / "context-snapshot.md"
+    snapshot_path = ctx.snapshot_path
 
     if snapshot_path.exists():
         return MigrateResult("skipped", "context-snapshot.md 已存在")
@@ -1107,45 +1394,42 @@ def migrate_create_context_snapshot(ctx: UpgradeContext) -> MigrateResult:
         completed = progress.get("completed", 0)
         total = progress.get("total_tasks", 0)
 
-    now = datetime.now(timezone.utc).isoformat()
+    now = utc_isoformat()
 
     # 优先使用模板文件
-    framework_dir = get_framework_dir()
+    framework_dir = ctx.framework_dir
     snapshot_tmpl = framework_dir / "templates" / "project" / "context-snapshot.md.tmpl"
     if snapshot_tmpl.exists():
-        content = snapshot_tmpl.read_text(encoding="utf-8")
-        replacements = {
-            "{{TIMESTAMP}}": now,
-            "{{MODE}}": mode,
-            "{{ITERATION}}": iteration,
-            "{{PHASE}}": phase,
-            "{{TASK_ID}}": "无",
-            "{{STATUS}}": "N/A",
-            "{{CURRENT_STEP}}": "N/A",
-            "{{TOOLCHAIN}}": "auto",
-            "{{ITERATION_MODE}}": "standard",
-            "{{TOTAL}}": str(total),
-            "{{COMPLETED}}": str(completed),
-            "{{IN_PROGRESS}}": "0",
-            "{{PENDING}}": str(total - completed),
-            "{{COMPLETED_LIST}}": "无" if completed == 0 else "（详见 tasks/）",
-            "{{IN_PROGRESS_DETAIL}}": "无",
-            "{{PENDING_LIST}}": "无" if total == 0 else "（详见 tasks/）",
-            "{{DEPENDENCIES}}": "无",
-            "{{TECH_DECISIONS}}": "从 v2.6 升级到 v3.0，初始快照",
-            "{{FOUND_ISSUES}}": "无",
-            "{{TECH_DETAILS}}": "无",
-            "{{L1_PASSED}}": "0",
-            "{{L1_FAILED}}": "0",
-            "{{L2_PASSED}}": "0",
-            "{{PENDING_VERIFY_LIST}}": "无",
-            "{{REWORK_TASKS}}": "无",
-            "{{NEXT_ACTION_1}}": "确认升级完成",
-            "{{NEXT_ACTION_2}}": "启动 Claude Code 继续开发",
-            "{{NEXT_ACTION_3}}": "按需开始新迭代",
-        }
-        for placeholder, value in replacements.items():
-            content = content.replace(placeholder, value)
+        content = _render_template(_read_template(snapshot_tmpl), {
+            "TIMESTAMP": now,
+            "MODE": mode,
+            "ITERATION": iteration,
+            "PHASE": phase,
+            "TASK_ID": "无",
+            "STATUS": "N/A",
+            "CURRENT_STEP": "N/A",
+            "TOOLCHAIN": "auto",
+            "ITERATION_MODE": "standard",
+            "TOTAL": str(total),
+            "COMPLETED": str(completed),
+            "IN_PROGRESS": "0",
+            "PENDING": str(total - completed),
+            "COMPLETED_LIST": "无" if completed == 0 else "（详见 tasks/）",
+            "IN_PROGRESS_DETAIL": "无",
+            "PENDING_LIST": "无" if total == 0 else "（详见 tasks/）",
+            "DEPENDENCIES": "无",
+            "TECH_DECISIONS": "从 v2.6 升级到 v3.0，初始快照",
+            "FOUND_ISSUES": "无",
+            "TECH_DETAILS": "无",
+            "L1_PASSED": "0",
+            "L1_FAILED": "0",
+            "L2_PASSED": "0",
+            "PENDING_VERIFY_LIST": "无",
+            "REWORK_TASKS": "无",
+            "NEXT_ACTION_1": "确认升级完成",
+            "NEXT_ACTION_2": "启动 Claude Code 继续开发",
+            "NEXT_ACTION_3": "按需开始新迭代",
+        })
     else:
         # fallback: 内联生成
         content = (
@@ -1163,7 +1447,7 @@ def migrate_create_context_snapshot(ctx: UpgradeContext) -> MigrateResult:
             f"1. 确认升级完成\n"
             f"2. 启动 Claude Code 继续开发\n"
         )
-    snapshot_path.write_text(content, encoding="utf-8")
+    atomic_write_text(snapshot_path, content)
     return MigrateResult("applied", "创建 context-snapshot.md", 1)
 
 
@@ -1173,13 +1457,13 @@ def migrate_create_context_snapshot(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_update_run_config_snapshot(ctx: UpgradeContext) -> MigrateResult:
     """在 run-config.yaml 中添加 snapshot 配置块。"""
-    rc_path = ctx.dev_state / "run-config.yaml"
+    rc_path = ctx.run_config_path
     if not rc_path.exists():
-        return MigrateResult("skipped", "run-config.yaml 不存在")
+        return _SKIP_NO_RUN_CONFIG
 
-    content = rc_path.read_text(encoding="utf-8")
+    data = rc_path.read_bytes()
 
-    if "snapshot:" in content:
+    if b"snapshot:" in data:
         return MigrateResult("skipped", "run-config.yaml 已包含 snapshot 配置")
 
     if ctx.dry_run:
@@ -1196,8 +1480,8 @@ def migrate_update_run_config_snapshot(ctx: UpgradeContext) -> MigrateResult:
         '  update_frequency: "per_step"\n'
     )
 
-    content = content.rstrip() + "\n" + snapshot_block
-    rc_path.write_text(content, encoding="utf-8")
+    content = _decode_text(data).rstrip() + "\n" + snapshot_block
+    atomic_write_text(rc_path, content)
     return MigrateResult("applied", "添加 snapshot 配置块", 1)
 
 
@@ -1207,22 +1491,25 @@ def migrate_update_run_config_snapshot(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_update_gitignore_v3(ctx: UpgradeContext) -> MigrateResult:
     """在 .gitignore 中添加 context-snapshot.md。"""
-    gitignore = ctx.project_dir / ".gitignore"
+    gitignore = ctx.gitignore_path
 
-    if not gitignore.exists():
+    try:
+        data = gitignore.read_bytes()
+    except FileNotFoundError:
         if ctx.dry_run:
             return MigrateResult("skipped", "[dry-run] .gitignore 不存在")
         # 创建带有规则的 .gitignore
-        gitignore.write_text("**/context-snapshot.md\n", encoding="utf-8")
+        atomic_write_text(gitignore, "**/context-snapshot.md\n")
         return MigrateResult("applied", "创建 .gitignore 并添加 context-snapshot.md", 1)
 
-    content = gitignore.read_text(encoding="utf-8")
-    if "context-snapshot.md" in content:
+    if b"context-snapshot.md" in data:
         return MigrateResult("skipped", ".gitignore 已包含 context-snapshot.md 规则")
 
     if ctx.dry_run:
         return MigrateResult("skipped", "[dry-run] 将添加 context-snapshot.md 到 .gitignore")
 
+    content = _decode_text(data)
+
     # 在框架规则块中添加
     marker_end = "# === dev-framework: 自动生成规则结束 ==="
     if marker_end in content:
@@ -1233,7 +1520,7 @@ def migrate_update_gitignore_v3(ctx: UpgradeContext) -> MigrateResult:
     else:
         content = content.rstrip() + "\n**/context-snapshot.md\n"
 
-    gitignore.write_text(content, encoding="utf-8")
+    atomic_write_text(gitignore, content)
     return MigrateResult("applied", "添加 context-snapshot.md 到 .gitignore", 1)
 
 
@@ -1243,17 +1530,19 @@ def migrate_update_gitignore_v3(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_write_version_marker_v3(ctx: UpgradeContext) -> MigrateResult:
     """写入 .framework-version = "3.0"。"""
-    version_file = ctx.dev_state / ".framework-version"
+    version_file = ctx.version_path
 
-    if version_file.exists():
-        existing = version_file.read_text(encoding="utf-8").strip()
-        if existing == TARGET_VERSION and not ctx.force:
-            return MigrateResult("skipped", f"版本标记已是 {TARGET_VERSION}")
+    try:
+        existing = version_file.read_bytes().strip()
+    except FileNotFoundError:
+        existing = b""
+    if existing == _VERSION_MARKER.rstrip() and not ctx.force:
+        return MigrateResult("skipped", f"版本标记已是 {TARGET_VERSION}")
 
     if ctx.dry_run:
         return MigrateResult("skipped", f"[dry-run] 将写入 .framework-version = {TARGET_VERSION}")
 
-    version_file.write_text(TARGET_VERSION + "\n", encoding="utf-8")
+    atomic_write_bytes(version_file, _VERSION_MARKER)
     return MigrateResult("applied", f"写入 .framework-version = {TARGET_VERSION}", 1)
 
 
@@ -1264,7 +1553,7 @@ def migrate_write_version_marker_v3(ctx: UpgradeContext) -> MigrateResult:
 def migrate_create_agents_dir(ctx: UpgradeContext) -> MigrateResult:
     """v4.0: 创建 .claude/agents/ 目录并注入子代理定义文件。"""
     agents_dir = ctx.project_dir / ".claude" / "agents"
-    framework_dir = get_framework_dir()
+    framework_dir = ctx.framework_dir
     agents_src = framework_dir / "templates" / "agents"
 
     if not agents_src.exists():
@@ -1283,28 +1572,33 @@ def migrate_create_agents_dir(ctx: UpgradeContext) -> MigrateResult:
         agents_dir.mkdir(parents=True, exist_ok=True)
 
     # 读取工具链配置用于模板变量替换
-    config = load_run_config(ctx.project_dir)
-    toolchain = detect_toolchain(ctx.project_dir, config)
+    toolchain = _detect_toolchain(ctx)
 
     _shared_rules_path = agents_src / "_shared-rules.md"
-    _shared_rules = "\n" + _shared_rules_path.read_text(encoding="utf-8") if _shared_rules_path.exists() else ""
-    copied = 0
+    _shared_rules = "\n" + _read_template(_shared_rules_path) if _shared_rules_path.exists() else ""
+    values = {
+        "FRAMEWORK_PATH": str(framework_dir),
+        "TEST_RUNNER": toolchain["test_runner"],
+        "PYTHON": toolchain["python"],
+    }
+    injected: list[tuple[Path, str]] = []
     for fname in agent_files:
         src = agents_src / fname
-        dst = agents_dir / fname
         if not src.exists():
-            _log(ctx, f"跳过: {fname}（模板不存在）")
+            if ctx.verbose:
+                _log(ctx, f"跳过: {fname}（模板不存在）")
             continue
-        if not ctx.dry_run:
-            content = src.read_text(encoding="utf-8")
-            content = content.replace("{{FRAMEWORK_PATH}}", str(framework_dir))
-            content = content.replace("{{TEST_RUNNER}}", toolchain["test_runner"])
-            content = content.replace("{{PYTHON}}", toolchain["python"])
-            content += _shared_rules
-            dst.write_text(content, encoding="utf-8")
-        copied += 1
-        _log(ctx, f"注入: .claude/agents/{fname}")
+        content = "" if ctx.dry_run else _render_template(_read_template(src), values) + _shared_rules
+        injected.append((agents_dir / fname, content))
+
+    # 各子代理文件互不依赖，统一交给线程池并发写入
+    if not ctx.dry_run:
+        _map_io(lambda item: atomic_write_text(*item), injected)
+    if ctx.verbose:
+        for dst, _ in injected:
+            _log(ctx, f"注入: .claude/agents/{dst.name}")
 
+    copied = len(injected)
     return MigrateResult("applied", f"注入 {copied} 个子代理定义文件", copied)
 
 
@@ -1314,9 +1608,9 @@ def migrate_create_agents_dir(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_regenerate_claude_md_v4(ctx: UpgradeContext) -> MigrateResult:
     """v4.0: 使用精简版模板重新生成 .claude/CLAUDE.md（仅 Leader 协议 + 子代理索引）。"""
-    framework_dir = get_framework_dir()
+    framework_dir = ctx.framework_dir
     fw_tmpl = framework_dir / "templates" / "project" / "CLAUDE-framework.md.tmpl"
-    claude_md = ctx.project_dir / ".claude" / "CLAUDE.md"
+    claude_md = ctx.claude_md_path
 
     if not fw_tmpl.exists():
         return MigrateResult("error", f"v4.0 模板不存在: {fw_tmpl}")
@@ -1325,21 +1619,23 @@ def migrate_regenerate_claude_md_v4(ctx: UpgradeContext) -> MigrateResult:
         return MigrateResult("skipped", ".claude/CLAUDE.md 不存在，跳过")
 
     # 提取现有的项目坑点内容
-    existing_content = claude_md.read_text(encoding="utf-8")
+    existing_content = _decode_text(claude_md.read_bytes())
     gotchas = ""
 
     # 尝试从 v3.0 格式提取（"十一、已知坑点" 或 "八、已知坑点"）
+    # 每个标记只做一次 find（命中位置直接用作切片起点，不再 in + index 重复扫描）
     for marker in ["## 十一、已知坑点与最佳实践", "## 八、已知坑点与最佳实践"]:
-        if marker in existing_content:
-            start = existing_content.index(marker) + len(marker)
-            # 找到下一个 ## 标题或文件结尾
-            rest = existing_content[start:]
+        start = existing_content.find(marker)
+        if start != -1:
+            start += len(marker)
+            # 找到下一个 ## 标题或文件结尾（从 start 起原地查找，不切出文件剩余部分）
             end_markers = ["\n## 十二、", "\n## 九、", "\n## 十、"]
-            end = len(rest)
+            end = len(existing_content)
             for em in end_markers:
-                if em in rest:
-                    end = min(end, rest.index(em))
-            gotchas_raw = rest[:end].strip()
+                pos = existing_content.find(em, start, end)
+                if pos != -1:
+                    end = pos
+            gotchas_raw = existing_content[start:end].strip()
             # 跳过注释行
             gotchas_lines = [
                 l for l in gotchas_raw.split("\n")
@@ -1353,28 +1649,31 @@ def migrate_regenerate_claude_md_v4(ctx: UpgradeContext) -> MigrateResult:
 
     # 提取项目特有部分（非框架部分，如果存在 CLAUDE.md.tmpl 生成的内容）
     project_part = ""
-    # 查找分隔线标记
-    if "\n---\n\n# Dev-Framework 运行时手册" in existing_content:
-        project_part = existing_content[:existing_content.index("\n---\n\n# Dev-Framework 运行时手册")]
-    elif "# Dev-Framework 运行时手册" in existing_content and not existing_content.startswith("# Dev-Framework 运行时手册"):
-        project_part = existing_content[:existing_content.index("# Dev-Framework 运行时手册")].rstrip("\n- ")
+    # 查找分隔线标记（手册标题位于文件开头时整份都是框架内容，无项目部分）
+    manual_title = "# Dev-Framework 运行时手册"
+    sep_pos = existing_content.find("\n---\n\n" + manual_title)
+    if sep_pos != -1:
+        project_part = existing_content[:sep_pos]
+    else:
+        title_pos = existing_content.find(manual_title)
+        if title_pos > 0:
+            project_part = existing_content[:title_pos].rstrip("\n- ")
 
     if not ctx.dry_run:
-        fw_content = fw_tmpl.read_text(encoding="utf-8")
-        fw_content = fw_content.replace("{{FRAMEWORK_PATH}}", str(framework_dir))
-        fw_content = fw_content.replace("{{PROJECT_GOTCHAS}}", gotchas)
-
-        config = load_run_config(ctx.project_dir)
-        toolchain = detect_toolchain(ctx.project_dir, config)
-        fw_content = fw_content.replace("{{TEST_RUNNER}}", toolchain["test_runner"])
-        fw_content = fw_content.replace("{{PYTHON}}", toolchain["python"])
+        toolchain = _detect_toolchain(ctx)
+        fw_content = _render_template(_read_template(fw_tmpl), {
+            "FRAMEWORK_PATH": str(framework_dir),
+            "PROJECT_GOTCHAS": gotchas,
+            "TEST_RUNNER": toolchain["test_runner"],
+            "PYTHON": toolchain["python"],
+        })
 
         if project_part:
             final_content = project_part + "\n\n---\n\n" + fw_content
         else:
             final_content = fw_content
 
-        claude_md.write_text(final_content, encoding="utf-8")
+        atomic_write_text(claude_md, final_content)
 
     return MigrateResult("applied", "重新生成 .claude/CLAUDE.md（v4.0 精简版）")
 
@@ -1385,22 +1684,23 @@ def migrate_regenerate_claude_md_v4(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_update_gitignore_v4(ctx: UpgradeContext) -> MigrateResult:
     """v4.0: 更新 .gitignore 注释（agents/ 目录说明）。"""
-    gitignore = ctx.project_dir / ".gitignore"
-    if not gitignore.exists():
-        return MigrateResult("skipped", ".gitignore 不存在")
-
-    content = gitignore.read_text(encoding="utf-8")
-
-    # 更新注释：v3.0 → v4.0
-    old_comment = "v3.0 Agent 协议已合并到 CLAUDE.md"
-    new_comment = "v4.0 子代理协议位于 .claude/agents/"
-    if old_comment in content:
+    gitignore = ctx.gitignore_path
+    try:
+        data = gitignore.read_bytes()
+    except FileNotFoundError:
+        return _SKIP_NO_GITIGNORE
+
+    # 更新注释：v3.0 → v4.0（直接在字节上替换；未命中时 replace 返回原内容）
+    new_data = data.replace(
+        "v3.0 Agent 协议已合并到 CLAUDE.md".encode("utf-8"),
+        "v4.0 子代理协议位于 .claude/agents/".encode("utf-8"),
+    )
+    if new_data != data:
         if not ctx.dry_run:
-            content = content.replace(old_comment, new_comment)
-            gitignore.write_text(content, encoding="utf-8")
+            atomic_write_bytes(gitignore, new_data)
         return MigrateResult("applied", "更新 .gitignore 注释为 v4.0")
 
-    return MigrateResult("skipped", ".gitignore 中无 v3.0 注释标记")
+    return _SKIP_NO_V3_MARK
 
 
 # ============================================================
@@ -1409,12 +1709,8 @@ def migrate_update_gitignore_v4(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_update_init_project_comment(ctx: UpgradeContext) -> MigrateResult:
     """v4.0: 更新 session-state.json 中的 agents 字段说明。"""
-    state_path = ctx.dev_state / "session-state.json"
-    if not state_path.exists():
-        return MigrateResult("skipped", "session-state.json 不存在")
-
-    # session-state.json 结构不变，无需修改
-    return MigrateResult("skipped", "session-state.json 结构不变")
+    # session-state.json 结构不变，无需修改（文件是否存在都不影响结果，不再 stat）
+    return _SKIP_SS_UNCHANGED
 
 
 # ============================================================
@@ -1423,9 +1719,15 @@ def migrate_update_init_project_comment(ctx: UpgradeContext) -> MigrateResult:
 
 def migrate_write_version_marker_v4(ctx: UpgradeContext) -> MigrateResult:
     """v4.0: 写入版本标记 .framework-version = '4.0'。"""
-    version_file = ctx.dev_state / ".framework-version"
+    version_file = ctx.version_path
     if not ctx.dry_run:
-        version_file.write_text("4.0\n", encoding="utf-8")
+        # Step 20 通常已写入相同内容，一致时不再重写
+        try:
+            current = version_file.read_bytes()
+        except FileNotFoundError:
+            current = b""
+        if current != _VERSION_MARKER:
+            atomic_write_bytes(version_file, _VERSION_MARKER)
     return MigrateResult("applied", "版本标记更新为 4.0")
 
 
@@ -1433,6 +1735,10 @@ def migrate_write_version_marker_v4(ctx: UpgradeContext) -> MigrateResult:
 # 主流程
 # ============================================================
 
+# 步骤结果在逐步输出 / 汇总报告中的显示
+_STATUS_ICONS = {"applied": "OK", "skipped": "--", "error": "!!"}
+_STATUS_TEXT = {"applied": "已应用", "skipped": "跳过", "error": "错误"}
+
 # 迁移步骤定义（name, label, function）
 MIGRATE_STEPS = [
     ("preflight_check",         "环境预检",                     migrate_preflight_check),
@@ -1465,6 +1771,44 @@ MIGRATE_STEPS = [
     ("write_version_marker_v4",   "写入 v4.0 版本标记",         migrate_write_version_marker_v4),
 ]
 
+# 步骤间的显式先后依赖（step -> 必须排在它之前的步骤），导入时由 _check_step_order 校验。
+# MIGRATE_STEPS 的顺序即执行与编号顺序，新增步骤时在此登记其依赖，放错位置会立即报错。
+_STEP_DEPS: dict[str, tuple[str, ...]] = {
+    "detect_current_version":     ("preflight_check",),
+    "create_backup":              ("detect_current_version",),
+    "rename_iteration_dirs":      ("create_backup",),
+    "acceptance_criteria":        ("rename_iteration_dirs",),
+    "add_priority":               ("rename_iteration_dirs",),
+    "review_issues":              ("rename_iteration_dirs",),
+    "experience_log":             ("claude_md",),
+    "git_hooks":                  ("run_config",),
+    "generate_merged_claude_md":  ("experience_log", "run_config"),
+    "update_run_config_snapshot": ("run_config",),
+    "update_gitignore_v3":        ("gitignore",),
+    "create_agents_dir":          ("create_backup", "agent_protocols"),
+    "regenerate_claude_md_v4":    ("generate_merged_claude_md",),
+    "update_gitignore_v4":        ("update_gitignore_v3",),
+    "write_version_marker_v4":    ("write_version_marker_v3",),
+}
+
+
+def _check_step_order(steps: list, deps: dict[str, tuple[str, ...]]) -> None:
+    """校验步骤名唯一、依赖均已定义且排在被依赖步骤之前；不满足时抛出 RuntimeError。"""
+    position = {}
+    for i, (name, _, _) in enumerate(steps):
+        if name in position:
+            raise RuntimeError(f"迁移步骤重复定义: {name}")
+        position[name] = i
+    for name, before in deps.items():
+        if name not in position:
+            raise RuntimeError(f"依赖表中的步骤未定义: {name}")
+        for dep in before:
+            if position.get(dep, len(steps)) >= position[name]:
+                raise RuntimeError(f"迁移步骤顺序错误: {dep} 必须排在 {name} 之前")
+
+
+_check_step_order(MIGRATE_STEPS, _STEP_DEPS)
+
 
 def run_upgrade(ctx: UpgradeContext) -> bool:
     """执行全部迁移步骤，返回是否成功。"""
@@ -1478,8 +1822,9 @@ def run_upgrade(ctx: UpgradeContext) -> bool:
     print()
 
     has_error = False
+    total = len(MIGRATE_STEPS)
     for i, (name, label, func) in enumerate(MIGRATE_STEPS, 1):
-        prefix = f"[{i:2d}/{len(MIGRATE_STEPS)}]"
+        prefix = f"[{i:2d}/{total}]"
         try:
             result = func(ctx)
         except Exception as e:
@@ -1488,7 +1833,7 @@ def run_upgrade(ctx: UpgradeContext) -> bool:
         ctx.results.append((label, result))
 
         # 状态图标
-        icon = {"applied": "OK", "skipped": "--", "error": "!!"}.get(result.status, "??")
+        icon = _STATUS_ICONS.get(result.status, "??")
         print(f"  {prefix} [{icon}] {label}: {result.message}")
 
         if result.status == "error":
@@ -1502,35 +1847,42 @@ def run_upgrade(ctx: UpgradeContext) -> bool:
             print(f"\n  已是 v{TARGET_VERSION}，无需升级。")
             return True
 
-    # 输出汇总报告
-    print()
-    print("=" * 60)
-    print("  升级报告")
-    print("=" * 60)
-    print()
-    print(f"  {'步骤':<35} {'状态':<10} {'变更数':<6}")
-    print(f"  {'-'*35} {'-'*10} {'-'*6}")
+    # 输出汇总报告：逐行收集后一次性写出，避免每行单独经过 TextIO 编码/刷新
+    out = [
+        "",
+        "=" * 60,
+        "  升级报告",
+        "=" * 60,
+        "",
+        f"  {'步骤':<35} {'状态':<10} {'变更数':<6}",
+        f"  {'-'*35} {'-'*10} {'-'*6}",
+    ]
+    # 输出明细的同一遍循环中累计各状态数与变更总数
+    counts = {"applied": 0, "skipped": 0, "error": 0}
+    total_changes = 0
     for label, result in ctx.results:
-        status_text = {"applied": "已应用", "skipped": "跳过", "error": "错误"}.get(result.status, result.status)
-        print(f"  {label:<33} {status_text:<8} {result.changes:>4}")
-    print()
-
-    applied = sum(1 for _, r in ctx.results if r.status == "applied")
-    skipped = sum(1 for _, r in ctx.results if r.status == "skipped")
-    errors = sum(1 for _, r in ctx.results if r.status == "error")
-    total_changes = sum(r.changes for _, r in ctx.results)
+        status_text = _STATUS_TEXT.get(result.status, result.status)
+        out.append(f"  {label:<33} {status_text:<8} {result.changes:>4}")
+        if result.status in counts:
+            counts[result.status] += 1
+        total_changes += result.changes
+    out.append("")
 
-    print(f"  合计: {applied} 已应用, {skipped} 跳过, {errors} 错误, {total_changes} 项变更")
+    errors = counts["error"]
+    out.append(f"  合计: {counts['applied']} 已应用, {counts['skipped']} 跳过, {errors} 错误, {total_changes} 项变更")
 
     if ctx.backup_dir:
-        print(f"  备份: {ctx.backup_dir}")
+        out.append(f"  备份: {ctx.backup_dir}")
 
+    out.append("")
     if not has_error:
-        print(f"\n  升级完成! 当前版本: v{TARGET_VERSION}")
+        out.append(f"  升级完成! 当前版本: v{TARGET_VERSION}")
     else:
-        print(f"\n  升级完成（有 {errors} 个错误，请检查）")
+        out.append(f"  升级完成（有 {errors} 个错误，请检查）")
 
-    print()
+    out.append("")
+    sys.stdout.write("\n".join(out) + "\n")
+    sys.stdout.flush()
     return not has_error
 
 
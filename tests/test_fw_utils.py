@@ -211,6 +211,13 @@ class TestDetectToolchain:
         assert "test_runner" in result
         assert "python" in result
 
+    def test_cached_result_is_independent_copy(self, tmp_path):
+        first = fw_utils.detect_toolchain(tmp_path, {})
+        first["python"] = "mutated"
+        assert fw_utils.detect_toolchain(tmp_path, {})["python"] != "mutated"
+        config = {"toolchain": {"python": fw_utils.sys.executable}}
+        assert fw_utils.detect_toolchain(tmp_path, config)["python"] == fw_utils.sys.executable
+
 
 # ============================================================
 # Tier 2: build_test_cmd
@@ -238,6 +245,11 @@ class TestBuildTestCmd:
         assert cmd[0] == "uv"
         assert "pytest" in cmd
 
+    def test_returned_list_is_independent(self):
+        toolchain = {"test_runner": "uv run pytest"}
+        fw_utils.build_test_cmd(toolchain, "tests/", ["-x"]).append("--junk")
+        assert fw_utils.build_test_cmd(toolchain, "tests/") == ["uv", "run", "pytest", "tests/"]
+
 
 # ============================================================
 # Tier 2: load_run_config — needs tmp_path
@@ -276,3 +288,144 @@ class TestLoadRunConfig:
         (config_dir / "run-config.yaml").write_text("", encoding="utf-8")
         result = fw_utils.load_run_config(tmp_path)
         assert result == {}
+
+
+# ============================================================
+# Tier 2: load_yaml_cached / save_task_yaml — needs tmp_path
+# ============================================================
+
+class TestLoadYamlCached:
+    """load_yaml_cached() caches by (path, mtime, size, inode, ctime) and returns copies."""
+
+    def test_roundtrip(self, tmp_path):
+        task_path = tmp_path / "CR-001.yaml"
+        fw_utils.save_task_yaml(task_path, {"id": "CR-001", "title": "中文标题"})
+        assert fw_utils.load_yaml_cached(task_path) == {"id": "CR-001", "title": "中文标题"}
+
+    def test_returns_independent_copy(self, tmp_path):
+        task_path = tmp_path / "CR-001.yaml"
+        task_path.write_text("id: CR-001\nstatus: pending\n", encoding="utf-8")
+        first = fw_utils.load_yaml_cached(task_path)
+        first["status"] = "PASS"
+        assert fw_utils.load_yaml_cached(task_path)["status"] == "pending"
+
+    def test_invalidated_on_change(self, tmp_path):
+        task_path = tmp_path / "CR-001.yaml"
+        task_path.write_text("status: pending\n", encoding="utf-8")
+        assert fw_utils.load_yaml_cached(task_path)["status"] == "pending"
+        task_path.write_text("status: in_progress\n", encoding="utf-8")
+        assert fw_utils.load_yaml_cached(task_path)["status"] == "in_progress"
+
+    def test_same_size_rewrite_with_same_mtime(self, tmp_path):
+        import os
+        task_path = tmp_path / "CR-001.yaml"
+        fw_utils.save_task_yaml(task_path, {"status": "FAIL"})
+        os.utime(task_path, ns=(1_000_000_000_000_000_000,) * 2)
+        assert fw_utils.load_yaml_cached(task_path)["status"] == "FAIL"
+        fw_utils.save_task_yaml(task_path, {"status": "PASS"})
+        os.utime(task_path, ns=(1_000_000_000_000_000_000,) * 2)
+        assert fw_utils.load_yaml_cached(task_path)["status"] == "PASS"
+
+    def test_recently_modified_file_bypasses_cache(self, tmp_path):
+        task_path = tmp_path / "CR-001.yaml"
+        task_path.write_text("status: pending\n", encoding="utf-8")
+        before = fw_utils._parse_yaml_file.cache_info().currsize
+        assert fw_utils.load_yaml_cached(task_path)["status"] == "pending"
+        assert fw_utils._parse_yaml_file.cache_info().currsize == before
+
+    def test_load_task_yaml_corrupt(self, tmp_path):
+        task_path = tmp_path / "CR-001.yaml"
+        task_path.write_text("{{invalid yaml: [", encoding="utf-8")
+        assert fw_utils.load_task_yaml(task_path) is None
+
+    def test_load_yaml_text_matches_dump(self):
+        data = {"id": "CR-001", "acceptance_criteria": {"functional": [{"id": "CR-001-AC1"}]}}
+        assert fw_utils.load_yaml_text(fw_utils.dump_yaml(data)) == data
+
+
+class TestScanFiles:
+    """scan_files() lists files by suffix in name order."""
+
+    def test_filters_and_sorts(self, tmp_path):
+        for name in ("CR-002.yaml", "CR-001.yaml", "notes.md"):
+            (tmp_path / name).write_text("", encoding="utf-8")
+        (tmp_path / "sub.yaml").mkdir()
+        names = [e.name for e in fw_utils.scan_files(tmp_path, ".yaml")]
+        assert names == ["CR-001.yaml", "CR-002.yaml"]
+
+    def test_missing_dir(self, tmp_path):
+        assert fw_utils.scan_files(tmp_path / "missing", ".yaml") == []
+
+
+class TestAtomicWriteText:
+    """atomic_write_text() replaces the target without leaving temp files."""
+
+    def test_overwrite(self, tmp_path):
+        target = tmp_path / "session-state.json"
+        target.write_text("old", encoding="utf-8")
+        fw_utils.atomic_write_text(target, "新内容\n")
+        assert target.read_text(encoding="utf-8") == "新内容\n"
+        assert [p.name for p in tmp_path.iterdir()] == ["session-state.json"]
+
+    def test_failed_write_keeps_old_content(self, tmp_path):
+        target = tmp_path / "state.json"
+        target.write_text("old", encoding="utf-8")
+        with pytest.raises(TypeError):
+            fw_utils.atomic_write_text(target, None)  # type: ignore[arg-type]
+        assert target.read_text(encoding="utf-8") == "old"
+        assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+    def test_write_bytes_keeps_line_endings(self, tmp_path):
+        target = tmp_path / "CR-001.yaml"
+        target.write_bytes(b"old\r\n")
+        fw_utils.atomic_write_bytes(target, b"id: CR-001\r\ntype: bug\r\n")
+        assert target.read_bytes() == b"id: CR-001\r\ntype: bug\r\n"
+        assert [p.name for p in tmp_path.iterdir()] == ["CR-001.yaml"]
+
+    def test_atomic_open_error_keeps_old_content(self, tmp_path):
+        target = tmp_path / "resume-summary.md"
+        target.write_text("old", encoding="utf-8")
+        with pytest.raises(RuntimeError):
+            with fw_utils.atomic_open(target) as fh:
+                fh.write("partial")
+                raise RuntimeError("interrupted")
+        assert target.read_text(encoding="utf-8") == "old"
+        assert [p.name for p in tmp_path.iterdir()] == ["resume-summary.md"]
+
+    def test_atomic_open_skip_unchanged(self, tmp_path):
+        import os
+        target = tmp_path / "resume-summary.md"
+        target.write_text("same", encoding="utf-8")
+        os.utime(target, ns=(1_000_000_000, 1_000_000_000))
+        with fw_utils.atomic_open(target, skip_unchanged=True) as fh:
+            fh.write("same")
+        assert target.stat().st_mtime_ns == 1_000_000_000
+        with fw_utils.atomic_open(target, skip_unchanged=True) as fh:
+            fh.write("changed")
+        assert target.read_text(encoding="utf-8") == "changed"
+        assert [p.name for p in tmp_path.iterdir()] == ["resume-summary.md"]
+
+
+class TestJsonHelpers:
+    """json_dumps()/json_loads() round-trip with or without orjson."""
+
+    def test_compact_roundtrip(self):
+        state = {"current_iteration": "iter-1", "note": "中文", "progress": {"total_tasks": 3}}
+        text = fw_utils.json_dumps(state)
+        assert "中文" in text and "\n" not in text and ", " not in text
+        assert fw_utils.json_loads(text) == state
+        assert fw_utils.json_loads(text.encode("utf-8")) == state
+
+    def test_pretty(self):
+        text = fw_utils.json_dumps({"a": 1}, pretty=True)
+        assert text == '{\n  "a": 1\n}'
+
+
+class TestUtcIsoformat:
+    """utc_isoformat() matches datetime.isoformat() for UTC timestamps."""
+
+    def test_matches_datetime(self):
+        from datetime import datetime, timezone
+        ns = 1_760_000_000_123_456_789
+        expected = datetime.fromtimestamp(ns // 10**9, timezone.utc).replace(microsecond=123456)
+        assert fw_utils.utc_isoformat(ns) == expected.isoformat()
@@ -0,0 +1,160 @@
+"""Tests for session-manager.py — task index, checkpoint/ledger numbering, state format."""
+
+import json
+import os
+from pathlib import Path
+
+# session-manager.py has a hyphen in filename, import via importlib
+import importlib.util
+
+_spec = importlib.util.spec_from_file_location(
+    "session_manager",
+    Path(__file__).resolve().parent.parent / "scripts" / "session-manager.py",
+)
+assert _spec is not None and _spec.loader is not None
+session_manager = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(session_manager)
+
+_load_tasks = session_manager._load_tasks
+
+# A fixed timestamp well in the past, so index entries are not treated as racy
+_OLD_NS = 1_000_000_000_000_000_000
+
+
+def _write_task(tasks_dir, name, text):
+    path = tasks_dir / name
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(_OLD_NS, _OLD_NS))
+    return path
+
+
+def _index_path(tasks_dir):
+    return tasks_dir.parent / session_manager._TASK_INDEX_NAME
+
+
+class _ParseCounter:
+    """Wrap _parse_task_summary to count YAML re-parses."""
+
+    def __init__(self, monkeypatch):
+        self.calls = 0
+        original = session_manager._parse_task_summary
+
+        def counting(item):
+            self.calls += 1
+            return original(item)
+
+        monkeypatch.setattr(session_manager, "_parse_task_summary", counting)
+
+
+# ============================================================
+# Index hits / invalidation
+# ============================================================
+
+class TestTaskIndex:
+    """_load_tasks() reuses index entries only when they are provably fresh."""
+
+    def test_builds_index_and_hits_on_rerun(self, tmp_project_with_iter, monkeypatch):
+        tasks_dir = tmp_project_with_iter / ".claude" / "dev-state" / "iter-1" / "tasks"
+        _write_task(tasks_dir, "CR-001.yaml", "id: CR-001\nstatus: PASS\ndesign: x\n")
+        assert _load_tasks(tasks_dir) == [{"id": "CR-001", "status": "PASS"}]
+        assert _index_path(tasks_dir).exists()
+
+        counter = _ParseCounter(monkeypatch)
+        assert _load_tasks(tasks_dir) == [{"id": "CR-001", "status": "PASS"}]
+        assert counter.calls == 0
+
+    def test_racy_entry_is_reparsed(self, tmp_project_with_iter):
+        tasks_dir = tmp_project_with_iter / ".claude" / "dev-state" / "iter-1" / "tasks"
+        task = _write_task(tasks_dir, "CR-001.yaml", "id: CR-001\nstatus: FAIL\n")
+        _load_tasks(tasks_dir)
+
+        # Same-length rewrite landing in the same timestamp tick as the index write
+        task.write_text("id: CR-001\nstatus: PASS\n", encoding="utf-8")
+        index_mtime = _index_path(tasks_dir).stat().st_mtime_ns
+        os.utime(task, ns=(index_mtime, index_mtime))
+        data = json.loads(_index_path(tasks_dir).read_text(encoding="utf-8"))
+        data["tasks"]["CR-001.yaml"]["mtime_ns"] = index_mtime
+        _index_path(tasks_dir).write_text(json.dumps(data), encoding="utf-8")
+        os.utime(_index_path(tasks_dir), ns=(index_mtime, index_mtime))
+
+        assert _load_tasks(tasks_dir) == [{"id": "CR-001", "status": "PASS"}]
+
+    def test_malformed_index_is_a_miss(self, tmp_project_with_iter):
+        tasks_dir = tmp_project_with_iter / ".claude" / "dev-state" / "iter-1" / "tasks"
+        _write_task(tasks_dir, "CR-001.yaml", "id: CR-001\nstatus: PASS\n")
+        for bad in (
+            "not json",
+            "[1, 2]",
+            '{"tasks": []}',
+            '{"tasks": {"CR-001.yaml": 5}}',
+            '{"tasks": {"CR-001.yaml": {"mtime_ns": 1, "size": 2}}}',
+        ):
+            _index_path(tasks_dir).write_text(bad, encoding="utf-8")
+            assert _load_tasks(tasks_dir) == [{"id": "CR-001", "status": "PASS"}]
+
+    def test_deleted_task_dropped_from_index(self, tmp_project_with_iter):
+        tasks_dir = tmp_project_with_iter / ".claude" / "dev-state" / "iter-1" / "tasks"
+        _write_task(tasks_dir, "CR-001.yaml", "id: CR-001\n")
+        removed = _write_task(tasks_dir, "CR-002.yaml", "id: CR-002\n")
+        assert len(_load_tasks(tasks_dir)) == 2
+
+        removed.unlink()
+        assert _load_tasks(tasks_dir) == [{"id": "CR-001"}]
+        data = json.loads(_index_path(tasks_dir).read_text(encoding="utf-8"))
+        assert list(data["tasks"]) == ["CR-001.yaml"]
+
+    def test_task_without_summary_fields_still_counted(self, tmp_project_with_iter):
+        tasks_dir = tmp_project_with_iter / ".claude" / "dev-state" / "iter-1" / "tasks"
+        _write_task(tasks_dir, "CR-001.yaml", "design: only\n")
+        assert _load_tasks(tasks_dir) == [{}]
+        assert _load_tasks(tasks_dir) == [{}]
+
+
+# ============================================================
+# Checkpoint / ledger numbering
+# ============================================================
+
+def _set_state(project, **fields):
+    state_path = project / ".claude" / "dev-state" / "session-state.json"
+    state = json.loads(state_path.read_text(encoding="utf-8"))
+    state.update(fields)
+    state_path.write_text(json.dumps(state), encoding="utf-8")
+
+
+class TestSequenceNumbers:
+    """New checkpoints / ledgers never get a number below the newest file on disk."""
+
+    def test_checkpoint_skips_past_newer_file_behind_counter(self, tmp_project_with_iter):
+        project = tmp_project_with_iter
+        _set_state(project, current_iteration="iter-1", checkpoint_seq={"iter-1": 3})
+        cp_dir = project / ".claude" / "dev-state" / "iter-1" / "checkpoints"
+        (cp_dir / "cp-005.md").write_text("old\n", encoding="utf-8")
+
+        session_manager.cmd_checkpoint(project)
+        assert (cp_dir / "cp-006.md").exists()
+        assert not (cp_dir / "cp-004.md").exists()
+
+    def test_ledger_skips_past_newer_file_behind_counter(self, tmp_project_with_iter):
+        project = tmp_project_with_iter
+        date_str = session_manager.utc_isoformat()[:10].replace("-", "")
+        _set_state(project, current_iteration="iter-1",
+                   ledger_seq={"iter-1": {"date": date_str, "seq": 1}})
+        ledger_dir = project / ".claude" / "dev-state" / "iter-1" / "ledger"
+        ledger_dir.mkdir()
+        (ledger_dir / f"session-{date_str}-03.md").write_text("old\n", encoding="utf-8")
+
+        session_manager.cmd_ledger(project)
+        assert (ledger_dir / f"session-{date_str}-04.md").exists()
+
+
+class TestStateFormat:
+    """session-state.json keeps the shared fw_utils format after session-manager writes it."""
+
+    def test_checkpoint_writes_shared_format(self, tmp_project_with_iter):
+        import fw_utils
+        project = tmp_project_with_iter
+        _set_state(project, current_iteration="iter-1")
+        session_manager.cmd_checkpoint(project)
+        text = (project / ".claude" / "dev-state" / "session-state.json").read_text(encoding="utf-8")
+        assert text == fw_utils.dump_session_state(json.loads(text))
+        assert "\n  " in text
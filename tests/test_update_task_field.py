@@ -56,6 +56,9 @@ class TestFieldAccess:
                 task = update_field(task, field, "a note")
             assert field in task
 
+    def test_every_writable_field_has_handler(self):
+        assert set(update_task_field._FIELD_HANDLERS) == WRITABLE_FIELDS
+
 
 # ============================================================
 # Status field validation
@@ -159,3 +162,39 @@ class TestNotes:
         task = update_field(task, "notes", "second")
         assert "second" in task["notes"]
         assert len(task["notes"]) == 2
+
+
+# ============================================================
+# ID validation
+# ============================================================
+
+class TestSafeId:
+    """--iteration-id / --task-id must be plain path components."""
+
+    def test_valid_ids(self):
+        for value in ("iter-1", "CR-001", "HF-12.a"):
+            update_task_field._check_safe_id("id", value)
+
+    def test_illegal_ids_rejected(self):
+        for value in ("..", "a/b", "a\\b", "/abs", "C:x", "a\x00b", "", "x" * 65, "iter‐1"):
+            with pytest.raises(SystemExit):
+                update_task_field._check_safe_id("id", value)
+
+
+class TestPathContainment:
+    """The resolved task path must stay under dev-state."""
+
+    def test_cross_drive_symlink_rejected(self, tmp_project, monkeypatch):
+        # On Windows commonpath raises ValueError when the paths are on different drives
+        def cross_drive(paths):
+            raise ValueError("Paths don't have the same drive")
+
+        monkeypatch.setattr(update_task_field.os.path, "commonpath", cross_drive)
+        monkeypatch.setattr(sys, "argv", [
+            "update-task-field.py", "--project-dir", str(tmp_project),
+            "--iteration-id", "iter-1", "--task-id", "CR-001",
+            "--field", "status", "--value", "PASS",
+        ])
+        with pytest.raises(SystemExit) as exc:
+            update_task_field.main()
+        assert exc.value.code == 1